@@ -15,6 +15,7 @@ class Settings(BaseSettings):
         "sms_notifications": "notifications.sms", 
         "email_notifications": "notifications.email"
     }
+    kafka_consume_batch_size: int = 20
     
     # Redis
     redis_url: str = "redis://localhost:6379"
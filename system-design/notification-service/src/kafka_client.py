@@ -83,7 +83,7 @@ class KafkaNotificationConsumer:
                 key_deserializer=lambda k: k.decode('utf-8') if k else None,
                 auto_offset_reset='earliest',
                 enable_auto_commit=False,  # Manual commit for better control
-                max_poll_records=10
+                max_poll_records=settings.kafka_consume_batch_size
             )
             logger.info(f"Successfully connected to Kafka consumer for topics: {self.topics}")
         except Exception as e:
@@ -91,24 +91,35 @@ class KafkaNotificationConsumer:
             raise
     
     def consume_messages(self, message_handler: Callable[[Dict[str, Any]], bool]):
-        """Consume messages and process them with the provided handler."""
+        """Consume messages in batches and process them with the provided handler."""
         try:
-            for message in self.consumer:
-                try:
-                    # Process the message
-                    success = message_handler(message.value)
-                    
-                    if success:
-                        # Commit the offset if processing was successful
-                        self.consumer.commit()
-                        logger.debug(f"Successfully processed message from {message.topic}")
-                    else:
-                        logger.warning(f"Failed to process message from {message.topic}")
-                        # Don't commit - message will be reprocessed
+            while True:
+                # Fetch a batch of records per poll to amortize fetch and commit overhead
+                batch = self.consumer.poll(
+                    timeout_ms=1000,
+                    max_records=settings.kafka_consume_batch_size
+                )
+                
+                for partition, messages in batch.items():
+                    for message in messages:
+                        try:
+                            # Process the message
+                            if message_handler(message.value):
+                                logger.debug(f"Successfully processed message from {message.topic}")
+                                continue
+                            logger.warning(f"Failed to process message from {message.topic}")
+                        except Exception as e:
+                            logger.error(f"Error processing message: {e}")
                         
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-                    # Don't commit - message will be reprocessed
+                        # Rewind to the failed message so it is redelivered; later messages
+                        # of this partition come again with it instead of being acked past it
+                        self.consumer.seek(partition, message.offset)
+                        break
+                
+                if batch:
+                    # Commit the consumed positions once per batch: each partition is
+                    # committed only up to its last contiguous successful offset
+                    self.consumer.commit()
                     
         except KeyboardInterrupt:
             logger.info("Consumer interrupted by user")
@@ -3,7 +3,8 @@ import logging
 import structlog
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
 from ..config import settings
 from ..database import get_database
 from ..kafka_client import KafkaNotificationConsumer
@@ -34,6 +35,11 @@ logging.basicConfig(level=getattr(logging, settings.log_level.upper()))
 class BaseNotificationWorker(ABC):
     """Base class for notification workers."""
     
+    # User fields holding the recipient, in order of preference
+    _recipient_keys: Tuple[str, ...] = ()
+    # Optional provider override per recipient field (read-only; subclasses assign their own)
+    _recipient_providers: Mapping[str, BaseNotificationProvider] = MappingProxyType({})
+    
     def __init__(self, worker_name: str, topics: list):
         self.worker_name = worker_name
         self.topics = topics
@@ -47,10 +53,20 @@ class BaseNotificationWorker(ABC):
         """Get the notification provider for this worker."""
         pass
     
-    @abstractmethod
-    def get_recipient_from_user(self, user_data: Dict[str, Any]) -> Optional[str]:
-        """Extract recipient information from user data."""
-        pass
+    def get_recipient_from_user(
+        self, user_data: Dict[str, Any]
+    ) -> Optional[Tuple[str, BaseNotificationProvider]]:
+        """Extract the recipient and the provider that delivers to it from user data."""
+        for key in self._recipient_keys:
+            recipient = user_data.get(key)
+            if recipient:
+                self.logger.info("Using recipient", field=key, recipient=self.mask_recipient(recipient))
+                return recipient, self._recipient_providers.get(key, self.provider)
+        return None
+    
+    def mask_recipient(self, recipient: str) -> str:
+        """Mask a recipient for logging."""
+        return recipient[:5] + "***"
     
     async def start(self):
         """Start the worker."""
@@ -118,17 +134,18 @@ class BaseNotificationWorker(ABC):
                 )
                 return True  # Don't retry - user doesn't exist
             
-            # Get recipient for this channel
-            recipient = self.get_recipient_from_user(user)
-            if not recipient:
+            # Get recipient and provider for this channel
+            found = self.get_recipient_from_user(user)
+            if not found:
                 self.logger.warning("No recipient info for user", user_id=user_id)
                 await self._update_notification_status(
                     notification_id, "failed", "No recipient information"
                 )
                 return True  # Don't retry - no recipient info
+            recipient, provider = found
             
             # Validate recipient
-            if not await self.provider.validate_recipient(recipient):
+            if not await provider.validate_recipient(recipient):
                 self.logger.warning("Invalid recipient", recipient=recipient[:10] + "...")
                 await self._update_notification_status(
                     notification_id, "failed", "Invalid recipient"
@@ -136,7 +153,7 @@ class BaseNotificationWorker(ABC):
                 return True  # Don't retry - invalid recipient
             
             # Send notification
-            result = await self.provider.send(recipient, title, content)
+            result = await provider.send(recipient, title, content)
             
             if result.success:
                 # Success - update notification status
@@ -1,4 +1,3 @@
-from typing import Dict, Any, Optional
 from .base_worker import BaseNotificationWorker
 from ..providers.email import sendgrid_provider
 from ..providers.base import BaseNotificationProvider
@@ -8,6 +7,8 @@ from ..config import settings
 class EmailNotificationWorker(BaseNotificationWorker):
     """Worker for processing email notifications."""
     
+    _recipient_keys = ("email",)
+    
     def __init__(self):
         topics = [settings.kafka_topics["email_notifications"]]
         super().__init__("email_notification_worker", topics)
@@ -16,16 +17,15 @@ class EmailNotificationWorker(BaseNotificationWorker):
         """Get email provider."""
         return sendgrid_provider
     
-    def get_recipient_from_user(self, user_data: Dict[str, Any]) -> Optional[str]:
-        """Extract email address from user data."""
-        email = user_data.get("email")
-        if email:
-            self.logger.info("Using email address", email=email[:3] + "***@" + email.split("@")[1] if "@" in email else "***")
-            return email
-        return None
+    def mask_recipient(self, recipient: str) -> str:
+        """Mask the local part of an email address for logging."""
+        local, at, domain = recipient.rpartition("@")
+        return f"{local[:3]}***@{domain}" if at else "***"
 
 
 if __name__ == "__main__":
     worker = EmailNotificationWorker()
     import asyncio
+    import uvloop
+    uvloop.install()
     asyncio.run(worker.start()) 
\ No newline at end of file
@@ -1,4 +1,5 @@
-from typing import Dict, Any, Optional
+import hashlib
+from types import MappingProxyType
 from .base_worker import BaseNotificationWorker
 from ..providers.push import apns_provider, fcm_provider
 from ..providers.base import BaseNotificationProvider
@@ -8,35 +9,31 @@ from ..config import settings
 class PushNotificationWorker(BaseNotificationWorker):
     """Worker for processing push notifications."""
     
+    # Prefer iOS token, fallback to Android (delivered through FCM)
+    _recipient_keys = ("ios_device_token", "android_device_token")
+    _recipient_providers = MappingProxyType({
+        "ios_device_token": apns_provider,
+        "android_device_token": fcm_provider,
+    })
+    
     def __init__(self):
         topics = [settings.kafka_topics["push_notifications"]]
         super().__init__("push_notification_worker", topics)
     
     def get_provider(self) -> BaseNotificationProvider:
         """Get push notification provider based on device token."""
-        # For simplicity, we'll use APNS as default
-        # In a real implementation, you'd determine the provider based on the device token format
+        # APNS is the default; each message uses the provider for the device
+        # token field its recipient came from (see _recipient_providers)
         return apns_provider
     
-    def get_recipient_from_user(self, user_data: Dict[str, Any]) -> Optional[str]:
-        """Extract device token from user data."""
-        # Prefer iOS token, fallback to Android
-        ios_token = user_data.get("ios_device_token")
-        android_token = user_data.get("android_device_token")
-        
-        if ios_token:
-            self.logger.info("Using iOS device token")
-            return ios_token
-        elif android_token:
-            self.logger.info("Using Android device token") 
-            # Switch to FCM provider for Android tokens
-            self.provider = fcm_provider
-            return android_token
-        
-        return None
+    def mask_recipient(self, recipient: str) -> str:
+        """Log a device token as a short hash; any prefix of the token is a credential."""
+        return "sha256:" + hashlib.sha256(recipient.encode()).hexdigest()[:12]
 
 
 if __name__ == "__main__":
     worker = PushNotificationWorker()
     import asyncio
+    import uvloop
+    uvloop.install()
     asyncio.run(worker.start()) 
\ No newline at end of file
@@ -1,4 +1,3 @@
-from typing import Dict, Any, Optional
 from .base_worker import BaseNotificationWorker
 from ..providers.sms import twilio_provider
 from ..providers.base import BaseNotificationProvider
@@ -8,6 +7,8 @@ from ..config import settings
 class SMSNotificationWorker(BaseNotificationWorker):
     """Worker for processing SMS notifications."""
     
+    _recipient_keys = ("phone_number",)
+    
     def __init__(self):
         topics = [settings.kafka_topics["sms_notifications"]]
         super().__init__("sms_notification_worker", topics)
@@ -15,17 +16,11 @@ class SMSNotificationWorker(BaseNotificationWorker):
     def get_provider(self) -> BaseNotificationProvider:
         """Get SMS provider."""
         return twilio_provider
-    
-    def get_recipient_from_user(self, user_data: Dict[str, Any]) -> Optional[str]:
-        """Extract phone number from user data."""
-        phone_number = user_data.get("phone_number")
-        if phone_number:
-            self.logger.info("Using phone number", phone=phone_number[:5] + "***")
-            return phone_number
-        return None
 
 
 if __name__ == "__main__":
     worker = SMSNotificationWorker()
     import asyncio
+    import uvloop
+    uvloop.install()
     asyncio.run(worker.start()) 
\ No newline at end of file
@@ -1,17 +1,21 @@
+import os
+import random
 import time
 import threading
 from typing import Dict, Optional
 from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import RedirectResponse
-from pydantic import BaseModel, HttpUrl
+from fastapi.responses import RedirectResponse, Response
+from pydantic import BaseModel, Field
 import uvicorn
 import duckdb
+import pyarrow as pa
 from contextlib import contextmanager
 
 
 # Pydantic models for request/response
 class URLShortenRequest(BaseModel):
-    url: HttpUrl
+    # Plain string gated by a pattern pydantic-core compiles once, instead of a full HttpUrl parse
+    url: str = Field(..., max_length=2048, pattern=r"^https?://[^\s]+$")
 
 
 class URLShortenResponse(BaseModel):
@@ -34,6 +38,9 @@ class IDGenerator:
         
         # Custom epoch (January 1, 2020 00:00:00 UTC)
         self.epoch = 1577836800000  # milliseconds
+        
+        # Fixed for the generator's lifetime, so pre-shift once instead of per ID
+        self._machine_bits = self.machine_id << 12
     
     def _current_timestamp(self) -> int:
         return int(time.time() * 1000)
@@ -57,7 +64,7 @@ class IDGenerator:
             self.last_timestamp = timestamp
             
             # Construct the ID
-            id_value = ((timestamp - self.epoch) << 22) | (self.machine_id << 12) | self.sequence
+            id_value = ((timestamp - self.epoch) << 22) | self._machine_bits | self.sequence
             return id_value
 
 
@@ -100,10 +107,17 @@ class URLDatabase:
     Provides ACID compliance and persistent storage while remaining embedded
     """
     
-    def __init__(self, db_path: str = "url_shortener.db"):
+    # Transient conflicts between threads: retries and backoff (seconds) before giving up
+    CONFLICT_RETRIES = 50
+    CONFLICT_BACKOFF_BASE = 0.001
+    CONFLICT_BACKOFF_MAX = 0.05
+    
+    def __init__(self, db_path: str = "url_shortener.db", read_only: bool = False):
         self.db_path = db_path
-        self.lock = threading.Lock()
-        self._init_database()
+        # Read-only replicas take DuckDB's shared lock and never create the schema
+        self.read_only = read_only
+        if not read_only:
+            self._init_database()
     
     def _init_database(self):
         """Initialize database and create tables if they don't exist"""
@@ -121,7 +135,16 @@ class URLDatabase:
             
             # Create indexes for fast lookups
             conn.execute("CREATE INDEX IF NOT EXISTS idx_short_url ON url_mappings(short_url)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_original_url ON url_mappings(original_url)")
+            
+            # original_url must be unique for the ON CONFLICT upsert; databases created
+            # before that carry a plain idx_original_url, which is rebuilt as UNIQUE
+            existing = conn.execute("""
+                SELECT is_unique FROM duckdb_indexes()
+                WHERE table_name = 'url_mappings' AND index_name = 'idx_original_url'
+            """).fetchone()
+            if existing and not existing[0]:
+                conn.execute("DROP INDEX idx_original_url")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_original_url ON url_mappings(original_url)")
             
             # Create table for tracking analytics (for future use)
             conn.execute("""
@@ -138,24 +161,86 @@ class URLDatabase:
     @contextmanager
     def _get_connection(self):
         """Get a database connection with proper cleanup"""
-        conn = duckdb.connect(self.db_path)
+        conn = self._connect()
         try:
             yield conn
         finally:
             conn.close()
     
+    def _connect(self):
+        """
+        Open a connection, retrying DuckDB's database-instance race
+        
+        Connections are per call, so one thread can attach the file while another is
+        closing its last connection; DuckDB then briefly reports the file as still
+        attached ("Unique file handle conflict").
+        """
+        for attempt in range(self.CONFLICT_RETRIES):
+            try:
+                return duckdb.connect(self.db_path, read_only=self.read_only)
+            except duckdb.BinderException as e:
+                if "Unique file handle conflict" not in str(e):
+                    raise
+                self._backoff(attempt)
+        return duckdb.connect(self.db_path, read_only=self.read_only)
+    
+    @classmethod
+    def _backoff(cls, attempt: int) -> None:
+        """Sleep a fully jittered exponential backoff so contending threads spread out"""
+        time.sleep(random.uniform(0, min(cls.CONFLICT_BACKOFF_MAX, cls.CONFLICT_BACKOFF_BASE * 2 ** attempt)))
+    
+    def _execute_write(self, conn, query: str, params: tuple):
+        """
+        Execute a write statement, retrying DuckDB write-write conflicts
+        
+        Writers are not serialized: writes to different rows commit in parallel under
+        MVCC. Two writers to the same row (e.g. click counters on a popular URL) conflict
+        and the loser's statement is rolled back with "Conflict on update"; it is retried
+        after a backoff. Requests served on the event loop run one statement at a time
+        and never conflict, so only threaded callers back off.
+        """
+        for attempt in range(self.CONFLICT_RETRIES):
+            try:
+                return conn.execute(query, params)
+            except duckdb.TransactionException:
+                self._backoff(attempt)
+        return conn.execute(query, params)
+    
     def store_url(self, id_value: int, short_url: str, original_url: str) -> None:
         """Store URL mapping in the database"""
-        with self.lock:
-            with self._get_connection() as conn:
-                try:
-                    conn.execute("""
-                        INSERT INTO url_mappings (id, short_url, original_url)
-                        VALUES (?, ?, ?)
-                    """, (id_value, short_url, original_url))
-                except duckdb.IntegrityError:
-                    # Handle potential race conditions or duplicate IDs
-                    raise ValueError(f"URL mapping already exists for ID {id_value}")
+        with self._get_connection() as conn:
+            try:
+                self._execute_write(conn, """
+                    INSERT INTO url_mappings (id, short_url, original_url)
+                    VALUES (?, ?, ?)
+                """, (id_value, short_url, original_url))
+            except duckdb.IntegrityError:
+                # Handle potential race conditions or duplicate IDs
+                raise ValueError(f"URL mapping already exists for ID {id_value}")
+    
+    def get_or_create_short_url(self, id_value: int, short_url: str, original_url: str) -> str:
+        """
+        Store URL mapping unless the original URL is already shortened
+        
+        Returns the short URL that maps to original_url: the new one on insert,
+        or the existing one when the URL was already stored.
+        """
+        with self._get_connection() as conn:
+            inserted = self._execute_write(conn, """
+                INSERT INTO url_mappings (id, short_url, original_url)
+                VALUES (?, ?, ?)
+                ON CONFLICT (original_url) DO NOTHING
+                RETURNING short_url
+            """, (id_value, short_url, original_url)).fetchone()
+            
+            if inserted:
+                return inserted[0]
+            
+            # Row already existed, fetch its short URL
+            return conn.execute("""
+                SELECT short_url FROM url_mappings 
+                WHERE original_url = ?
+            """, (original_url,)).fetchone()[0]
     
     def get_original_url(self, short_url: str) -> Optional[str]:
         """Retrieve original URL by short URL"""
@@ -204,13 +289,12 @@ class URLDatabase:
     
     def increment_click_count(self, short_url: str) -> None:
         """Increment click count for analytics"""
-        with self.lock:
-            with self._get_connection() as conn:
-                conn.execute("""
-                    UPDATE url_mappings 
-                    SET click_count = click_count + 1 
-                    WHERE short_url = ?
-                """, (short_url,))
+        with self._get_connection() as conn:
+            self._execute_write(conn, """
+                UPDATE url_mappings 
+                SET click_count = click_count + 1 
+                WHERE short_url = ?
+            """, (short_url,))
     
     def record_click(self, short_url: str, user_agent: str = None, 
                     ip_address: str = None, referer: str = None) -> None:
@@ -227,22 +311,24 @@ class URLDatabase:
             result = conn.execute("SELECT COUNT(*) FROM url_mappings").fetchone()
             return result[0] if result else 0
     
-    def get_recent_urls(self, limit: int = 10) -> list:
-        """Get recently created URLs"""
+    def get_recent_urls_table(self, limit: int = 10) -> pa.Table:
+        """Get recently created URLs as a columnar Arrow table"""
         with self._get_connection() as conn:
-            results = conn.execute("""
-                SELECT short_url, original_url, created_at, click_count
+            return conn.execute("""
+                SELECT short_url, original_url, created_at,
+                       COALESCE(click_count, 0) AS total_clicks
                 FROM url_mappings 
                 ORDER BY created_at DESC 
                 LIMIT ?
-            """, (limit,)).fetchall()
-            
-            return [{
-                "short_url": row[0],
-                "original_url": row[1],
-                "created_at": row[2].isoformat() if row[2] else None,
-                "total_clicks": row[3] or 0
-            } for row in results]
+            """, (limit,)).to_arrow_table()
+    
+    def get_recent_urls(self, limit: int = 10) -> list:
+        """Get recently created URLs"""
+        records = self.get_recent_urls_table(limit).to_pylist()
+        for record in records:
+            created_at = record["created_at"]
+            record["created_at"] = created_at.isoformat() if created_at else None
+        return records
 
 
 # Initialize components
@@ -254,7 +340,7 @@ app = FastAPI(
 
 id_generator = IDGenerator(machine_id=1)
 base62_converter = Base62Converter()
-url_database = URLDatabase()
+url_database = URLDatabase(read_only=os.getenv("URL_DB_READ_ONLY", "").lower() in ("1", "true"))
 
 
 @app.get("/")
@@ -277,15 +363,7 @@ async def shorten_url(request: URLShortenRequest):
     This endpoint takes a long URL and returns a shortened version.
     Uses base-62 conversion of unique IDs to generate short URLs.
     """
-    original_url = str(request.url)
-    
-    # Check if URL already exists to avoid duplicates
-    existing_short = url_database.get_short_url(original_url)
-    if existing_short:
-        return URLShortenResponse(
-            short_url=existing_short,
-            original_url=original_url
-        )
+    original_url = request.url
     
     try:
         # Generate unique ID using Snowflake-like algorithm
@@ -294,8 +372,8 @@ async def shorten_url(request: URLShortenRequest):
         # Convert ID to base-62 string
         short_code = base62_converter.encode(unique_id)
         
-        # Store in database
-        url_database.store_url(unique_id, short_code, original_url)
+        # Store in database, or reuse the existing short URL to avoid duplicates
+        short_code = url_database.get_or_create_short_url(unique_id, short_code, original_url)
         
         return URLShortenResponse(
             short_url=short_code,
@@ -326,12 +404,13 @@ async def redirect_url(short_url: str):
             detail="Short URL not found"
         )
     
-    # Record analytics (increment click count)
-    try:
-        url_database.increment_click_count(short_url)
-    except Exception:
-        # Don't fail the redirect if analytics recording fails
-        pass
+    # Record analytics (increment click count), read-only replicas skip it
+    if not url_database.read_only:
+        try:
+            url_database.increment_click_count(short_url)
+        except Exception:
+            # Don't fail the redirect if analytics recording fails
+            pass
     
     # Use 302 redirect for analytics tracking
     # Every request hits our service, allowing us to collect click analytics
@@ -370,6 +449,25 @@ async def get_recent_urls(limit: int = 10):
     }
 
 
+@app.get("/api/v1/admin/recent.arrow")
+async def get_recent_urls_arrow(limit: int = 10):
+    """
+    Get recently created URLs as an Arrow IPC stream (admin endpoint for analytics clients)
+    """
+    if limit > 100:
+        limit = 100  # Prevent excessive data retrieval
+    
+    table = url_database.get_recent_urls_table(limit)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    
+    return Response(
+        content=sink.getvalue().to_pybytes(),
+        media_type="application/vnd.apache.arrow.stream"
+    )
+
+
 @app.get("/api/v1/admin/stats")
 async def get_system_stats():
     """
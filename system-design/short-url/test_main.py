@@ -2,6 +2,7 @@ import pytest
 import os
 import tempfile
 import shutil
+import duckdb
 from fastapi.testclient import TestClient
 from main import app, id_generator, base62_converter, URLDatabase
 
@@ -193,6 +194,22 @@ def test_admin_recent_urls(test_db):
     assert data["total_count"] >= 3
 
 
+def test_admin_recent_urls_arrow(test_db):
+    """Test the Arrow IPC export of recent URLs"""
+    import pyarrow as pa
+    
+    for i in range(3):
+        client.post("/api/v1/data/shorten", json={"url": f"https://www.example.com/arrow/{i}"})
+    
+    response = client.get("/api/v1/admin/recent.arrow?limit=5")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == 3
+    assert table.column_names == ["short_url", "original_url", "created_at", "total_clicks"]
+
+
 def test_admin_system_stats(test_db):
     """Test the admin system statistics endpoint"""
     # Create a test URL
@@ -219,6 +236,16 @@ def test_invalid_url(test_db):
     assert response.status_code == 422  # Validation error
 
 
+def test_url_too_long(test_db):
+    """Test shortening a URL longer than the stored column allows"""
+    response = client.post(
+        "/api/v1/data/shorten",
+        json={"url": "https://www.example.com/" + "a" * 2048}
+    )
+    
+    assert response.status_code == 422  # Validation error
+
+
 def test_base62_converter():
     """Test the base-62 conversion utility"""
     # Test encoding
@@ -270,44 +297,102 @@ def test_database_persistence(test_db):
     assert retrieved_url == test_url
 
 
-def test_concurrent_url_creation(test_db):
-    """Test creating multiple URLs concurrently"""
-    import threading
-    import time
+def test_legacy_schema_migration():
+    """Test that a database created with the original schema still accepts shortens"""
+    temp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(temp_dir, "legacy_url_shortener.db")
+    try:
+        # Original schema: original_url without UNIQUE and a plain index on it
+        conn = duckdb.connect(db_path)
+        conn.execute("""
+            CREATE TABLE url_mappings (
+                id BIGINT PRIMARY KEY,
+                short_url VARCHAR(20) UNIQUE NOT NULL,
+                original_url VARCHAR(2048) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                click_count INTEGER DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX idx_short_url ON url_mappings(short_url)")
+        conn.execute("CREATE INDEX idx_original_url ON url_mappings(original_url)")
+        conn.execute("""
+            INSERT INTO url_mappings (id, short_url, original_url)
+            VALUES (1, 'old', 'https://www.example.com/legacy')
+        """)
+        conn.close()
+
+        legacy_db = URLDatabase(db_path)
+        assert legacy_db.get_or_create_short_url(2, "new", "https://www.example.com/legacy") == "old"
+        assert legacy_db.get_or_create_short_url(3, "fresh", "https://www.example.com/other") == "fresh"
+        assert legacy_db.get_total_urls() == 2
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_read_only_database(test_db):
+    """Test that a read-only replica serves lookups but rejects writes"""
+    test_url = "https://www.example.com/read/only/test"
     
-    results = []
-    errors = []
+    shorten_response = client.post(
+        "/api/v1/data/shorten",
+        json={"url": test_url}
+    )
+    short_code = shorten_response.json()["short_url"]
+    
+    replica = URLDatabase(test_db.db_path, read_only=True)
+    assert replica.get_original_url(short_code) == test_url
     
-    def create_url(index):
-        try:
-            response = client.post(
+    with pytest.raises(duckdb.Error):
+        replica.increment_click_count(short_code)
+
+
+def test_concurrent_writers_same_row(test_db):
+    """Test that concurrent writes to one row all land instead of conflicting"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    short_code = test_db.get_or_create_short_url(42, "hot", "https://www.example.com/hot")
+
+    threads, clicks_per_thread = 8, 25
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(lambda: [test_db.increment_click_count(short_code) for _ in range(clicks_per_thread)])
+            for _ in range(threads)
+        ]
+        for future in futures:
+            future.result()
+
+    assert test_db.get_url_stats(short_code)["total_clicks"] == threads * clicks_per_thread
+
+
+@pytest.fixture
+def anyio_backend():
+    """Run async tests on asyncio only"""
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_concurrent_url_creation(test_db):
+    """Test creating multiple URLs concurrently"""
+    import asyncio
+    import httpx
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        # Create 10 URLs concurrently
+        responses = await asyncio.gather(*[
+            async_client.post(
                 "/api/v1/data/shorten",
-                json={"url": f"https://www.example.com/concurrent/test/{index}"}
+                json={"url": f"https://www.example.com/concurrent/test/{i}"}
             )
-            if response.status_code == 200:
-                results.append(response.json())
-            else:
-                errors.append(response.status_code)
-        except Exception as e:
-            errors.append(str(e))
-    
-    # Create 10 URLs concurrently
-    threads = []
-    for i in range(10):
-        thread = threading.Thread(target=create_url, args=(i,))
-        threads.append(thread)
-        thread.start()
-    
-    # Wait for all threads to complete
-    for thread in threads:
-        thread.join()
+            for i in range(10)
+        ])
     
     # Verify results
+    errors = [response.status_code for response in responses if response.status_code != 200]
     assert len(errors) == 0, f"Errors occurred: {errors}"
-    assert len(results) == 10
     
     # Verify all short URLs are unique
-    short_urls = [result["short_url"] for result in results]
+    short_urls = [response.json()["short_url"] for response in responses]
     assert len(set(short_urls)) == 10  # All should be unique
 
 
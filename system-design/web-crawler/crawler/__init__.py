@@ -7,5 +7,6 @@ distributed systems design principles.
 
 from .web_crawler import WebCrawler
 from .config import CrawlerConfig
+from .storage import Storage
 
-__all__ = ["WebCrawler", "CrawlerConfig"] 
\ No newline at end of file
+__all__ = ["WebCrawler", "CrawlerConfig", "Storage"] 
\ No newline at end of file
@@ -16,11 +16,32 @@ class CrawlerConfig(BaseModel):
     max_concurrent_requests: int = Field(default=10, ge=1, le=100, description="Max concurrent requests")
     request_delay: float = Field(default=1.0, ge=0.1, description="Delay between requests (seconds)")
     request_timeout: int = Field(default=30, ge=1, description="Request timeout (seconds)")
+    per_host_concurrency: int = Field(default=2, ge=1, description="Max concurrent requests per host")
+    num_workers: Optional[int] = Field(
+        default=None, ge=1,
+        description="Crawler worker tasks (None = 4x max_concurrent_requests)"
+    )
+    connection_limit: Optional[int] = Field(
+        default=1000, ge=1,
+        description="Max open connections in the crawler's HTTP client pool (None = unlimited)"
+    )
     
     # URL filtering
     allowed_domains: Optional[List[str]] = Field(default=None, description="Allowed domains (None = all)")
     blocked_domains: List[str] = Field(default_factory=list, description="Blocked domains")
     max_url_length: int = Field(default=2048, ge=1, description="Maximum URL length")
+    domain_queue_cap: int = Field(
+        default=10_000, ge=1,
+        description="Max in-memory queued URLs per domain; the rest wait in the frontier database"
+    )
+    frontier_load_batch_size: int = Field(
+        default=50_000, ge=1,
+        description="Pending URLs loaded from the frontier database per batch"
+    )
+    frontier_db_path: Path = Field(
+        default=Path("crawler_frontier.db"),
+        description="SQLite database file backing the URL frontier"
+    )
     
     # Storage settings
     storage_dir: Path = Field(default=Path("./crawl_data"), description="Directory to store crawled data")
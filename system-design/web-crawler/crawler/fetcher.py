@@ -5,24 +5,45 @@ This module handles HTTP requests with robust error handling,
 timeout management, and content type validation.
 """
 
-import aiohttp
 import asyncio
+import charset_normalizer
+import hashlib
+import httpx
 import time
-from typing import Optional, Dict, Any
-from urllib.parse import urlparse
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Dict, Any, Tuple
 import structlog
 
 from .models import CrawledPage, CrawlResult, CrawlStatus
 from .config import CrawlerConfig
+from .urls import extract_domain
 
 logger = structlog.get_logger()
 
+# Response headers kept on CrawledPage (revalidation and size hints only)
+_KEPT_HEADERS = ('content-type', 'last-modified', 'etag', 'content-length')
+
+_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+
+# Declared charsets whose bytes the parser can take as they are
+_UTF8_CHARSETS = frozenset({'utf-8', 'utf8', 'us-ascii', 'ascii'})
+
+@lru_cache(maxsize=128)
+def _allowed_content_type(raw_content_type: str, allowed: frozenset) -> bool:
+    """Cached content-type check; a crawl only sees a handful of distinct header values."""
+    if not raw_content_type:
+        return False
+    
+    return raw_content_type.split(';')[0].strip().lower() in allowed
+
 
 class Fetcher:
     """
     Fetcher downloads web page content.
     
     Features:
+    - HTTP/2 client multiplexing requests to the same host over one connection
     - Robust HTTP client with retry logic
     - Content type validation
     - File size limits
@@ -30,39 +51,82 @@ class Fetcher:
     - Proper error handling for various HTTP status codes
     """
     
-    def __init__(self, config: CrawlerConfig):
+    def __init__(self, config: CrawlerConfig, session: Optional[httpx.AsyncClient] = None):
         self.config = config
-        self._session: Optional[aiohttp.ClientSession] = None
+        # An injected client is shared with other crawlers and outlives this
+        # fetcher; otherwise initialize() creates one and cleanup() closes it
+        self._session: Optional[httpx.AsyncClient] = session
+        self._owns_session = session is None
+        self._headers = {
+            "User-Agent": config.user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.5",
+            "Accept-Encoding": "br, gzip, deflate",
+            "DNT": "1",
+            "Upgrade-Insecure-Requests": "1"
+        }
+        # A shared client carries someone else's defaults, so this crawler's
+        # headers, timeout and redirect policy go on each request instead
+        self._request_options: Dict[str, Any] = {} if session is None else {
+            "headers": self._headers,
+            "timeout": config.request_timeout,
+            "follow_redirects": True,
+        }
+        
+        # Back-pressure: cap in-flight requests overall and per host
+        self._global_semaphore = asyncio.Semaphore(config.max_concurrent_requests)
+        # Per-host semaphores live only while a request holds or awaits them,
+        # so a crawl across millions of hosts doesn't keep one per host forever
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_users: Dict[str, int] = {}
+        self._allowed_content_types = frozenset(config.allowed_content_types)
+        
+        # Status code -> response handler
+        self._status_handlers = {
+            200: self._handle_ok,
+            403: self._handle_forbidden,
+            404: self._handle_not_found,
+            429: self._handle_rate_limited,
+        }
         self.total_requests = 0
         self.successful_requests = 0
         self.failed_requests = 0
     
+    @property
+    def session(self) -> Optional[httpx.AsyncClient]:
+        """Shared HTTP client, so other components reuse the same connection pool."""
+        return self._session
+    
     async def initialize(self):
-        """Initialize the fetcher with HTTP session."""
-        # Configure connection limits and timeouts
-        connector = aiohttp.TCPConnector(
-            limit=self.config.max_concurrent_requests * 2,
-            limit_per_host=10,
-            ttl_dns_cache=300,
-            use_dns_cache=True
-        )
+        """
+        Initialize the fetcher with HTTP session.
         
-        timeout = aiohttp.ClientTimeout(total=self.config.request_timeout)
+        Called exactly once per crawl (paired with cleanup); the client and
+        its keep-alive connections then serve every fetch and retry.
+        """
+        if not self._owns_session:
+            logger.info("Fetcher initialized", shared_session=True)
+            return
         
-        headers = {
-            "User-Agent": self.config.user_agent,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate",
-            "DNT": "1",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1"
-        }
+        # Configure connection limits and timeouts; robots.txt lookups share
+        # this pool, so it is sized by connection_limit rather than fetch
+        # concurrency (the fetch semaphores bound in-flight page requests)
+        limits = httpx.Limits(
+            max_connections=self.config.connection_limit,
+            max_keepalive_connections=self.config.max_concurrent_requests,
+            keepalive_expiry=30
+        )
+        
+        timeout = httpx.Timeout(self.config.request_timeout)
         
-        self._session = aiohttp.ClientSession(
-            connector=connector,
+        # HTTP/2 multiplexes concurrent requests to the same host over a single
+        # connection; redirects are followed
+        self._session = httpx.AsyncClient(
+            http2=True,
+            limits=limits,
             timeout=timeout,
-            headers=headers
+            headers=self._headers,
+            follow_redirects=True
         )
         
         logger.info("Fetcher initialized")
@@ -85,17 +149,22 @@ class Fetcher:
         try:
             logger.debug("Fetching URL", url=url, depth=depth)
             
-            # Validate URL
-            parsed_url = urlparse(url)
-            if not parsed_url.scheme or not parsed_url.netloc:
+            # Validate URL; the host is all the fetch needs
+            host = extract_domain(url)
+            if not host:
                 return CrawlResult(
                     url=url,
                     status=CrawlStatus.FAILED,
                     error_message="Invalid URL format"
                 )
             
-            # Make HTTP request
-            async with self._session.get(url) as response:
+            # Make HTTP request; the host slot comes first so requests queued
+            # behind a busy host don't sit on global slots other hosts could use
+            async with (
+                self._host_slot(host),
+                self._global_semaphore,
+                self._session.stream("GET", url, **self._request_options) as response,
+            ):
                 processing_time = time.time() - start_time
                 
                 # Check content type
@@ -121,107 +190,48 @@ class Fetcher:
                         processing_time=processing_time
                     )
                 
-                # Handle different HTTP status codes
-                if response.status == 200:
-                    # Read content with size limit
-                    content = await self._read_content_safely(response)
-                    
-                    if content is None:
-                        return CrawlResult(
-                            url=url,
-                            status=CrawlStatus.FAILED,
-                            error_message="Content too large or read error",
-                            processing_time=processing_time
-                        )
-                    
-                    # Create crawled page
-                    page = CrawledPage(
-                        url=url,
-                        status_code=response.status,
-                        content_type=content_type.split(';')[0].strip(),
-                        content=content,
-                        headers=dict(response.headers),
-                        parent_url=parent_url,
-                        depth=depth,
-                        file_size=len(content.encode('utf-8'))
-                    )
-                    
-                    self.successful_requests += 1
-                    logger.debug("Successfully fetched URL", 
-                               url=url, size=len(content), 
-                               processing_time=processing_time)
-                    
-                    return CrawlResult(
-                        url=url,
-                        status=CrawlStatus.SUCCESS,
-                        page=page,
-                        processing_time=processing_time
-                    )
+                # Dispatch on HTTP status code
+                handler = self._status_handlers.get(response.status_code)
+                if handler:
+                    result = await handler(response, url, processing_time, depth, parent_url)
+                    if result.page is not None:
+                        # Hand the already-parsed host on so storage needn't reparse the URL
+                        result.page.domain = host
+                    return result
                 
-                elif response.status in [301, 302, 303, 307, 308]:
-                    # Handle redirects
+                if response.status_code in _REDIRECT_STATUSES:
+                    # Redirects are followed by the client; one only reaches
+                    # here when the redirect limit is exceeded or has no target
                     redirect_url = response.headers.get('location')
-                    if redirect_url:
-                        logger.debug("Redirect encountered", 
-                                   url=url, redirect_url=redirect_url,
-                                   status=response.status)
-                        # For now, we'll treat redirects as failed
-                        # In a more sophisticated implementation, 
-                        # we could follow redirects
-                        return CrawlResult(
-                            url=url,
-                            status=CrawlStatus.FAILED,
-                            error_message=f"Redirect to {redirect_url}",
-                            processing_time=processing_time
-                        )
-                
-                elif response.status == 404:
-                    logger.debug("Page not found", url=url)
-                    return CrawlResult(
-                        url=url,
-                        status=CrawlStatus.FAILED,
-                        error_message="Page not found (404)",
-                        processing_time=processing_time
-                    )
-                
-                elif response.status == 403:
-                    logger.debug("Access forbidden", url=url)
-                    return CrawlResult(
-                        url=url,
-                        status=CrawlStatus.ROBOTS_DENIED,
-                        error_message="Access forbidden (403)",
-                        processing_time=processing_time
-                    )
-                
-                elif response.status == 429:
-                    logger.warning("Rate limited", url=url)
+                    logger.debug("Redirect encountered", 
+                               url=url, redirect_url=redirect_url,
+                               status=response.status_code)
                     return CrawlResult(
                         url=url,
                         status=CrawlStatus.FAILED,
-                        error_message="Rate limited (429)",
+                        error_message=f"Redirect to {redirect_url}",
                         processing_time=processing_time
                     )
                 
-                elif response.status >= 500:
-                    logger.warning("Server error", url=url, status=response.status)
+                if response.status_code >= 500:
+                    logger.warning("Server error", url=url, status=response.status_code)
                     return CrawlResult(
                         url=url,
                         status=CrawlStatus.FAILED,
-                        error_message=f"Server error ({response.status})",
+                        error_message=f"Server error ({response.status_code})",
                         processing_time=processing_time
                     )
                 
-                else:
-                    logger.warning("Unexpected status code", 
-                                 url=url, status=response.status)
-                    return CrawlResult(
-                        url=url,
-                        status=CrawlStatus.FAILED,
-                        error_message=f"Unexpected status code: {response.status}",
-                        processing_time=processing_time
-                    )
+                logger.warning("Unexpected status code", 
+                             url=url, status=response.status_code)
+                return CrawlResult(
+                    url=url,
+                    status=CrawlStatus.FAILED,
+                    error_message=f"Unexpected status code: {response.status_code}",
+                    processing_time=processing_time
+                )
         
-        except asyncio.TimeoutError:
+        except httpx.TimeoutException:
             self.failed_requests += 1
             processing_time = time.time() - start_time
             logger.warning("Request timeout", url=url, timeout=self.config.request_timeout)
@@ -232,7 +242,7 @@ class Fetcher:
                 processing_time=processing_time
             )
         
-        except aiohttp.ClientError as e:
+        except httpx.HTTPError as e:
             self.failed_requests += 1
             processing_time = time.time() - start_time
             logger.error("Client error", url=url, error=str(e))
@@ -254,50 +264,163 @@ class Fetcher:
                 processing_time=processing_time
             )
     
-    async def _read_content_safely(self, response: aiohttp.ClientResponse) -> Optional[str]:
+    async def _handle_ok(self, response: httpx.Response, url: str, processing_time: float,
+                         depth: int, parent_url: Optional[str]) -> CrawlResult:
+        """Read a 200 response into a CrawledPage."""
+        # Read content with size limit
+        read = await self._read_content_safely(response)
+        
+        if read is None:
+            return CrawlResult(
+                url=url,
+                status=CrawlStatus.FAILED,
+                error_message="Content too large or read error",
+                processing_time=processing_time
+            )
+        
+        body, content_hash = read
+        content_type = response.headers.get('content-type', '').lower()
+        content = self._utf8_content(body, response.charset_encoding)
+        
+        # Create crawled page
+        page = CrawledPage(
+            url=url,
+            status_code=response.status_code,
+            content_type=content_type.split(';')[0].strip(),
+            content=content,
+            headers={k: response.headers[k] for k in _KEPT_HEADERS if k in response.headers},
+            parent_url=parent_url,
+            depth=depth,
+            file_size=len(body),
+            content_hash=content_hash
+        )
+        
+        self.successful_requests += 1
+        logger.debug("Successfully fetched URL", 
+                   url=url, size=len(content), 
+                   processing_time=processing_time)
+        
+        return CrawlResult(
+            url=url,
+            status=CrawlStatus.SUCCESS,
+            page=page,
+            processing_time=processing_time
+        )
+    
+    async def _handle_not_found(self, response: httpx.Response, url: str, processing_time: float,
+                                depth: int, parent_url: Optional[str]) -> CrawlResult:
+        """Handle a 404 response."""
+        logger.debug("Page not found", url=url)
+        return CrawlResult(
+            url=url,
+            status=CrawlStatus.FAILED,
+            error_message="Page not found (404)",
+            processing_time=processing_time
+        )
+    
+    async def _handle_forbidden(self, response: httpx.Response, url: str, processing_time: float,
+                                depth: int, parent_url: Optional[str]) -> CrawlResult:
+        """Handle a 403 response."""
+        logger.debug("Access forbidden", url=url)
+        return CrawlResult(
+            url=url,
+            status=CrawlStatus.ROBOTS_DENIED,
+            error_message="Access forbidden (403)",
+            processing_time=processing_time
+        )
+    
+    async def _handle_rate_limited(self, response: httpx.Response, url: str, processing_time: float,
+                                   depth: int, parent_url: Optional[str]) -> CrawlResult:
+        """Handle a 429 response."""
+        logger.warning("Rate limited", url=url)
+        return CrawlResult(
+            url=url,
+            status=CrawlStatus.FAILED,
+            error_message="Rate limited (429)",
+            processing_time=processing_time
+        )
+    
+    async def _read_content_safely(self, response: httpx.Response) -> Optional[Tuple[bytearray, str]]:
         """
-        Safely read response content with size limits.
+        Safely read response content with size limits, hashing it as it arrives.
         
         Args:
             response: HTTP response object
             
         Returns:
-            str: Response content or None if too large
+            Tuple of raw response body and its SHA-256 hex digest, or None if too large
         """
         try:
-            content_length = 0
-            chunks = []
+            # Single growable buffer: no chunk list and no join copy. Each chunk
+            # is hashed while still hot in cache instead of re-reading the body
+            body = bytearray()
+            digest = hashlib.sha256()
             
-            async for chunk in response.content.iter_chunked(8192):
-                content_length += len(chunk)
-                if content_length > self.config.max_file_size:
+            async for chunk in response.aiter_bytes(65536):
+                digest.update(chunk)
+                body.extend(chunk)
+                if len(body) > self.config.max_file_size:
                     logger.warning("Content too large during reading", 
-                                 url=str(response.url), size=content_length)
+                                 url=str(response.url), size=len(body))
                     return None
-                chunks.append(chunk)
-            
-            # Decode content
-            content_bytes = b''.join(chunks)
             
-            # Try to detect encoding
-            encoding = 'utf-8'
-            content_type = response.headers.get('content-type', '')
-            if 'charset=' in content_type:
-                try:
-                    encoding = content_type.split('charset=')[1].split(';')[0].strip()
-                except:
-                    encoding = 'utf-8'
-            
-            try:
-                return content_bytes.decode(encoding)
-            except UnicodeDecodeError:
-                # Fallback to utf-8 with error handling
-                return content_bytes.decode('utf-8', errors='replace')
+            return body, digest.hexdigest()
                 
         except Exception as e:
             logger.error("Error reading content", url=str(response.url), error=str(e))
             return None
     
+    def _utf8_content(self, body: bytearray, charset: Optional[str]) -> bytes:
+        """
+        Return a response body as UTF-8 bytes, transcoding only when needed.
+        
+        The parser reads bytes as UTF-8, so a body declared (or verified) as
+        UTF-8 is handed over without a decode/encode round-trip; any other
+        charset is decoded, detecting the encoding when the declared one
+        fails, and re-encoded once.
+        
+        Args:
+            body: Raw response body
+            charset: Charset declared in the Content-Type header, if any
+            
+        Returns:
+            bytes: UTF-8 encoded content
+        """
+        if charset and charset.lower() in _UTF8_CHARSETS:
+            return bytes(body)
+        
+        try:
+            text = body.decode(charset or 'utf-8')
+        except (UnicodeDecodeError, LookupError):
+            # Wrong or unknown declared charset: detect it from the bytes
+            best = charset_normalizer.from_bytes(bytes(body)).best()
+            text = str(best) if best is not None else body.decode('utf-8', errors='replace')
+        else:
+            if charset is None:
+                # Undeclared, but valid UTF-8 as it is
+                return bytes(body)
+        
+        return text.encode('utf-8')
+    
+    @asynccontextmanager
+    async def _host_slot(self, host: str) -> AsyncIterator[None]:
+        """Hold one of a host's concurrency slots, dropping its semaphore once idle."""
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.config.per_host_concurrency)
+            self._host_semaphores[host] = semaphore
+        self._host_users[host] = self._host_users.get(host, 0) + 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            users = self._host_users[host] - 1
+            if users:
+                self._host_users[host] = users
+            else:
+                del self._host_users[host]
+                del self._host_semaphores[host]
+    
     def _is_allowed_content_type(self, content_type: str) -> bool:
         """
         Check if content type is allowed.
@@ -308,11 +431,7 @@ class Fetcher:
         Returns:
             bool: True if allowed, False otherwise
         """
-        if not content_type:
-            return False
-        
-        content_type = content_type.split(';')[0].strip().lower()
-        return content_type in self.config.allowed_content_types
+        return _allowed_content_type(content_type, self._allowed_content_types)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get fetcher statistics."""
@@ -328,6 +447,6 @@ class Fetcher:
     
     async def cleanup(self):
         """Clean up resources."""
-        if self._session:
-            await self._session.close()
+        if self._session and self._owns_session:
+            await self._session.aclose()
         logger.info("Fetcher cleanup completed") 
\ No newline at end of file
@@ -5,8 +5,8 @@ Data models for the web crawler.
 from typing import Optional, Dict, List
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field, HttpUrl
-from dataclasses import dataclass
+from pydantic import BaseModel, Field
+from dataclasses import dataclass, field
 
 
 class CrawlStatus(str, Enum):
@@ -27,7 +27,7 @@ class ContentType(str, Enum):
     TEXT = "text/plain"
 
 
-@dataclass
+@dataclass(slots=True)
 class UrlInfo:
     """Information about a URL in the frontier."""
     url: str
@@ -41,31 +41,29 @@ class UrlInfo:
         return self.priority < other.priority
 
 
-class CrawledPage(BaseModel):
+@dataclass(slots=True)
+class CrawledPage:
     """Model for a crawled web page."""
-    url: HttpUrl
+    url: str
     status_code: int
     content_type: str
-    content: str
+    content: bytes  # UTF-8 encoded HTML
     title: Optional[str] = None
-    links: List[str] = Field(default_factory=list)
-    images: List[str] = Field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+    images: List[str] = field(default_factory=list)
     meta_description: Optional[str] = None
     meta_keywords: Optional[str] = None
-    headers: Dict[str, str] = Field(default_factory=dict)
-    crawled_at: datetime = Field(default_factory=datetime.now)
+    headers: Dict[str, str] = field(default_factory=dict)
+    crawled_at: datetime = field(default_factory=datetime.now)
     parent_url: Optional[str] = None
     depth: int = 0
     file_size: int = 0
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda dt: dt.isoformat(),
-            HttpUrl: lambda url: str(url)
-        }
+    content_hash: Optional[str] = None  # SHA-256 of the raw response body
+    domain: str = ""  # Lower-cased netloc, set by the fetcher
 
 
-class CrawlResult(BaseModel):
+@dataclass(slots=True)
+class CrawlResult:
     """Result of a crawl operation."""
     url: str
     status: CrawlStatus
@@ -73,9 +71,6 @@ class CrawlResult(BaseModel):
     error_message: Optional[str] = None
     processing_time: float = 0.0
     retries: int = 0
-    
-    class Config:
-        use_enum_values = True
 
 
 class RobotsTxtInfo(BaseModel):
@@ -85,6 +80,8 @@ class RobotsTxtInfo(BaseModel):
     crawl_delay: Optional[float] = None
     sitemap_urls: List[str] = Field(default_factory=list)
     last_fetched: datetime = Field(default_factory=datetime.now)
+    max_age: Optional[float] = None  # Cache-Control max-age of the robots.txt response
+    failed: bool = False  # Negative entry: fetch failed, allow-all fallback
     
     class Config:
         json_encoders = {
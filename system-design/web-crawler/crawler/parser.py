@@ -5,10 +5,13 @@ This module handles HTML parsing, link extraction, and content processing
 with robust error handling for malformed HTML.
 """
 
+import asyncio
 import re
-from typing import List, Optional, Set
+from concurrent.futures import Executor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
 from urllib.parse import urljoin, urlparse, urlunparse
-from bs4 import BeautifulSoup, Comment
+from selectolax.lexbor import LexborHTMLParser
 import structlog
 
 from .models import CrawledPage
@@ -22,7 +25,7 @@ class Parser:
     Parser extracts information from HTML documents.
     
     Features:
-    - Robust HTML parsing with BeautifulSoup
+    - Fast HTML5 parsing with selectolax (lexbor)
     - Link extraction with URL normalization
     - Content extraction (removing boilerplate)
     - Metadata extraction (title, description, keywords)
@@ -43,6 +46,21 @@ class Parser:
             '.mp3', '.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv',
             '.css', '.js', '.ico', '.xml', '.json'
         }
+        # Tuple form lets str.endswith check every extension in one C call
+        self._excluded_ext_tuple = tuple(self.excluded_extensions)
+        # Raw href prefixes that can never yield a crawlable link
+        self._skipped_href_prefixes = ('#', 'mailto:', 'javascript:', 'tel:', 'data:')
+        
+        # Frozen domain filters for constant-time membership checks
+        self._blocked_domains = frozenset(config.blocked_domains)
+        self._allowed_domains = frozenset(config.allowed_domains) if config.allowed_domains else None
+        
+        # scheme, host, path and query of an absolute http(s) URL in one C-level match
+        self._url_re = re.compile(r'^(https?)://([^/?#]+)([^?#]*)(?:\?([^#]*))?')
+        
+        # Config snapshot shipped to parse worker processes; a string so it
+        # pickles cheaply and doubles as the workers' parser cache key
+        self._config_json = config.model_dump_json()
         
         # Common boilerplate selectors to remove
         self.boilerplate_selectors = [
@@ -50,6 +68,8 @@ class Parser:
             '.advertisement', '.ads', '.sidebar', '.menu',
             '.navigation', '.breadcrumb', '.social-media'
         ]
+        # One combined selector so boilerplate removal walks the tree once
+        self._boilerplate_css = ", ".join(self.boilerplate_selectors)
     
     def parse(self, page: CrawledPage) -> CrawledPage:
         """
@@ -66,24 +86,42 @@ class Parser:
         try:
             logger.debug("Parsing page", url=page.url)
             
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(page.content, 'lxml')
+            self._apply_result(page, self.extract(page.content, str(page.url)))
             
-            # Extract title
-            page.title = self._extract_title(soup)
-            
-            # Extract meta information
-            page.meta_description = self._extract_meta_description(soup)
-            page.meta_keywords = self._extract_meta_keywords(soup)
+            self.successful_parses += 1
+            logger.debug("Successfully parsed page", 
+                        url=page.url, 
+                        links_found=len(page.links),
+                        images_found=len(page.images))
             
-            # Extract links
-            page.links = self._extract_links(soup, str(page.url))
+        except Exception as e:
+            self.failed_parses += 1
+            logger.error("Failed to parse page", url=page.url, error=str(e))
+            # Keep the original content if parsing fails
+        
+        return page
+    
+    async def parse_in_executor(self, page: CrawledPage, executor: Executor) -> CrawledPage:
+        """
+        Parse an HTML page in a worker process so the event loop keeps fetching.
+        
+        Args:
+            page: CrawledPage object to parse
+            executor: Process pool running _parse_worker
             
-            # Extract images
-            page.images = self._extract_images(soup, str(page.url))
+        Returns:
+            CrawledPage: Updated page with extracted information
+        """
+        self.total_parsed += 1
+        
+        try:
+            logger.debug("Parsing page", url=page.url)
             
-            # Extract main content (optional, can be resource intensive)
-            # page.content = self._extract_main_content(soup)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                executor, _parse_worker, page.content, str(page.url), self._config_json
+            )
+            self._apply_result(page, result)
             
             self.successful_parses += 1
             logger.debug("Successfully parsed page", 
@@ -98,84 +136,118 @@ class Parser:
         
         return page
     
-    def _extract_title(self, soup: BeautifulSoup) -> Optional[str]:
+    def extract(self, content: bytes, base_url: str) -> Dict[str, Any]:
+        """
+        Extract title, metadata, links and images from raw HTML.
+        
+        Args:
+            content: UTF-8 encoded HTML document
+            base_url: Base URL for resolving relative links
+            
+        Returns:
+            Dict of extracted fields, keyed like the CrawledPage attributes
+        """
+        # Parse HTML with lexbor
+        tree = LexborHTMLParser(content)
+        
+        return {
+            "title": self._extract_title(tree),
+            "meta_description": self._extract_meta_description(tree),
+            "meta_keywords": self._extract_meta_keywords(tree),
+            "links": self._extract_links(tree, base_url),
+            "images": self._extract_images(tree, base_url),
+        }
+    
+    @staticmethod
+    def _apply_result(page: CrawledPage, result: Dict[str, Any]) -> None:
+        """Copy extracted fields onto the page."""
+        page.title = result["title"]
+        page.meta_description = result["meta_description"]
+        page.meta_keywords = result["meta_keywords"]
+        page.links = result["links"]
+        page.images = result["images"]
+    
+    def _extract_title(self, tree: LexborHTMLParser) -> Optional[str]:
         """Extract page title."""
         try:
-            title_tag = soup.find('title')
-            if title_tag and title_tag.string:
-                return title_tag.string.strip()
+            title_tag = tree.css_first('title')
+            if title_tag:
+                title = title_tag.text(strip=True)
+                if title:
+                    return title
             
             # Fallback to h1 tag
-            h1_tag = soup.find('h1')
+            h1_tag = tree.css_first('h1')
             if h1_tag:
-                return h1_tag.get_text().strip()
+                return h1_tag.text().strip()
             
         except Exception as e:
             logger.debug("Error extracting title", error=str(e))
         
         return None
     
-    def _extract_meta_description(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_meta_description(self, tree: LexborHTMLParser) -> Optional[str]:
         """Extract meta description."""
         try:
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc and meta_desc.get('content'):
-                return meta_desc['content'].strip()
+            meta_desc = tree.css_first('meta[name="description"]')
+            if meta_desc and meta_desc.attributes.get('content'):
+                return meta_desc.attributes['content'].strip()
             
             # Fallback to og:description
-            og_desc = soup.find('meta', attrs={'property': 'og:description'})
-            if og_desc and og_desc.get('content'):
-                return og_desc['content'].strip()
+            og_desc = tree.css_first('meta[property="og:description"]')
+            if og_desc and og_desc.attributes.get('content'):
+                return og_desc.attributes['content'].strip()
             
         except Exception as e:
             logger.debug("Error extracting meta description", error=str(e))
         
         return None
     
-    def _extract_meta_keywords(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_meta_keywords(self, tree: LexborHTMLParser) -> Optional[str]:
         """Extract meta keywords."""
         try:
-            meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
-            if meta_keywords and meta_keywords.get('content'):
-                return meta_keywords['content'].strip()
+            meta_keywords = tree.css_first('meta[name="keywords"]')
+            if meta_keywords and meta_keywords.attributes.get('content'):
+                return meta_keywords.attributes['content'].strip()
             
         except Exception as e:
             logger.debug("Error extracting meta keywords", error=str(e))
         
         return None
     
-    def _extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
+    def _extract_links(self, tree: LexborHTMLParser, base_url: str) -> List[str]:
         """
         Extract and normalize links from the page.
         
         Args:
-            soup: BeautifulSoup object
+            tree: Parsed HTML tree
             base_url: Base URL for resolving relative links
             
         Returns:
             List of normalized URLs
         """
         links = []
-        seen_urls = set()
         
         try:
-            # Find all anchor tags with href attributes
-            for link in soup.find_all('a', href=True):
-                href = link['href'].strip()
-                
-                if not href or href.startswith('#'):
-                    continue
-                
-                # Resolve relative URLs
-                absolute_url = urljoin(base_url, href)
-                
-                # Normalize URL
-                normalized_url = self._normalize_url(absolute_url)
-                
-                if normalized_url and self._is_valid_url(normalized_url):
-                    if normalized_url not in seen_urls:
-                        links.append(normalized_url)
-                        seen_urls.add(normalized_url)
+            # Raw hrefs of all anchor tags
+            hrefs = [(a.attributes.get('href') or '').strip() for a in tree.css('a[href]')]
+            
+            # Drop fragments, non-http schemes and excluded file types with plain
+            # string checks before paying for urljoin
+            skipped_prefixes = self._skipped_href_prefixes
+            excluded_ext = self._excluded_ext_tuple
+            hrefs = [
+                h for h in hrefs
+                if h and not (hl := h.lower()).startswith(skipped_prefixes)
+                and not hl.endswith(excluded_ext)
+            ]
+            
+            # Resolve relative URLs and normalize
+            absolutes = [urljoin(base_url, h) for h in hrefs]
+            normalized = filter(None, map(self._normalize_url, absolutes))
+            
+            # dict.fromkeys dedupes while keeping document order
+            links = [u for u in dict.fromkeys(normalized) if self._is_valid_url(u)]
             
             logger.debug("Extracted links", count=len(links), base_url=base_url)
             
@@ -184,12 +256,12 @@ class Parser:
         
         return links
     
-    def _extract_images(self, soup: BeautifulSoup, base_url: str) -> List[str]:
+    def _extract_images(self, tree: LexborHTMLParser, base_url: str) -> List[str]:
         """
         Extract image URLs from the page.
         
         Args:
-            soup: BeautifulSoup object
+            tree: Parsed HTML tree
             base_url: Base URL for resolving relative links
             
         Returns:
@@ -200,8 +272,8 @@ class Parser:
         
         try:
             # Find all img tags with src attributes
-            for img in soup.find_all('img', src=True):
-                src = img['src'].strip()
+            for img in tree.css('img[src]'):
+                src = (img.attributes.get('src') or '').strip()
                 
                 if not src:
                     continue
@@ -223,25 +295,20 @@ class Parser:
         
         return images
     
-    def _extract_main_content(self, soup: BeautifulSoup) -> str:
+    def _extract_main_content(self, tree: LexborHTMLParser) -> str:
         """
         Extract main content from the page, removing boilerplate.
         
         Args:
-            soup: BeautifulSoup object
+            tree: Parsed HTML tree
             
         Returns:
             Cleaned main content
         """
         try:
             # Remove unwanted elements
-            for selector in self.boilerplate_selectors:
-                for element in soup.select(selector):
-                    element.decompose()
-            
-            # Remove comments
-            for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
-                comment.extract()
+            for element in tree.css(self._boilerplate_css):
+                element.decompose()
             
             # Try to find main content area
             main_selectors = [
@@ -251,21 +318,21 @@ class Parser:
             ]
             
             for selector in main_selectors:
-                main_element = soup.select_one(selector)
+                main_element = tree.css_first(selector)
                 if main_element:
-                    return main_element.get_text(separator=' ', strip=True)
+                    return main_element.text(separator=' ', strip=True)
             
             # Fallback to body content
-            body = soup.find('body')
+            body = tree.body
             if body:
-                return body.get_text(separator=' ', strip=True)
+                return body.text(separator=' ', strip=True)
             
             # Final fallback to all text
-            return soup.get_text(separator=' ', strip=True)
+            return tree.text(separator=' ', strip=True)
             
         except Exception as e:
             logger.error("Error extracting main content", error=str(e))
-            return soup.get_text(separator=' ', strip=True) if soup else ""
+            return tree.text(separator=' ', strip=True) if tree else ""
     
     def _normalize_url(self, url: str) -> Optional[str]:
         """
@@ -278,17 +345,24 @@ class Parser:
             Normalized URL or None if invalid
         """
         try:
-            parsed = urlparse(url)
-            
-            # Remove fragment
-            normalized = urlunparse((
-                parsed.scheme,
-                parsed.netloc.lower(),
-                parsed.path,
-                parsed.params,
-                parsed.query,
-                None  # Remove fragment
-            ))
+            match = self._url_re.match(url)
+            if match:
+                # Remove fragment
+                scheme, host, path, query = match.groups()
+                normalized = f"{scheme}://{host.lower()}{path}"
+                if query:
+                    normalized += f"?{query}"
+            else:
+                # Non-http(s) or unusual URLs take the full parser
+                parsed = urlparse(url)
+                normalized = urlunparse((
+                    parsed.scheme,
+                    parsed.netloc.lower(),
+                    parsed.path,
+                    parsed.params,
+                    parsed.query,
+                    None  # Remove fragment
+                ))
             
             # Remove trailing slash for non-root paths
             if normalized.endswith('/') and normalized.count('/') > 3:
@@ -304,48 +378,36 @@ class Parser:
         Check if URL is valid for crawling.
         
         Args:
-            url: URL to validate
+            url: Normalized URL to validate
             
         Returns:
             bool: True if valid, False otherwise
         """
-        try:
-            parsed = urlparse(url)
-            
-            # Must have scheme and netloc
-            if not parsed.scheme or not parsed.netloc:
-                return False
-            
-            # Only HTTP/HTTPS
-            if parsed.scheme not in ['http', 'https']:
-                return False
-            
-            # Check URL length
-            if len(url) > self.config.max_url_length:
-                return False
-            
-            # Check file extension
-            path_lower = parsed.path.lower()
-            for ext in self.excluded_extensions:
-                if path_lower.endswith(ext):
-                    return False
-            
-            # Check domain filtering
-            domain = parsed.netloc.lower()
-            
-            # Check blocked domains
-            if domain in self.config.blocked_domains:
-                return False
-            
-            # Check allowed domains (if specified)
-            if self.config.allowed_domains:
-                if domain not in self.config.allowed_domains:
-                    return False
-            
-            return True
-            
-        except Exception:
+        # Must be HTTP/HTTPS with a host
+        match = self._url_re.match(url)
+        if not match:
+            return False
+        
+        # Check URL length
+        if len(url) > self.config.max_url_length:
+            return False
+        
+        # Check file extension
+        if match.group(3).lower().endswith(self._excluded_ext_tuple):
+            return False
+        
+        # Check domain filtering (host is already lowercased by _normalize_url)
+        domain = match.group(2)
+        
+        # Check blocked domains
+        if domain in self._blocked_domains:
+            return False
+        
+        # Check allowed domains (if specified)
+        if self._allowed_domains is not None and domain not in self._allowed_domains:
             return False
+        
+        return True
     
     def get_stats(self) -> dict:
         """Get parser statistics."""
@@ -357,4 +419,21 @@ class Parser:
                 self.successful_parses / self.total_parsed 
                 if self.total_parsed > 0 else 0
             )
-        } 
\ No newline at end of file
+        }
+
+
+@lru_cache(maxsize=8)
+def _worker_parser(config_json: str) -> Parser:
+    """Parser for a config snapshot, built once per worker process."""
+    return Parser(CrawlerConfig.model_validate_json(config_json))
+
+
+def _parse_worker(content: bytes, base_url: str, config_json: str) -> Dict[str, Any]:
+    """
+    Process-pool entry point for HTML parsing.
+    
+    Top-level so it pickles by reference; reuses the worker's cached Parser
+    for the crawler's config and returns plain data the parent applies to
+    the page.
+    """
+    return _worker_parser(config_json).extract(content, base_url)
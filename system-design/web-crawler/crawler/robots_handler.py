@@ -5,19 +5,96 @@ This module handles robots.txt files to ensure the crawler respects
 website owners' crawling preferences.
 """
 
-import aiohttp
-import asyncio
-from typing import Dict, Optional
-from urllib.parse import urljoin, urlparse
+import httpx
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import quote, unquote, urljoin, urlparse, urlunparse
 from urllib.robotparser import RobotFileParser
 import structlog
 from datetime import datetime, timedelta
 
 from .models import RobotsTxtInfo
 from .config import CrawlerConfig
+from .urls import extract_domain
 
 logger = structlog.get_logger()
 
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)', re.IGNORECASE)
+
+class RobotsRules:
+    """
+    Allow/disallow rules of one robots.txt group, merged into two regexes.
+    
+    Each regex is an alternation of the rule paths ordered longest first, so
+    a single match finds the most specific rule; the longer of the matching
+    allow and disallow rules wins, with allow winning ties (RFC 9309). In a
+    rule path '*' matches any run of characters and a trailing '$' anchors
+    it to the end of the URL path.
+    """
+    
+    __slots__ = ("_allow", "_disallow")
+    
+    def __init__(self, allow: Iterable[str], disallow: Iterable[str]):
+        self._allow = self._compile(allow)
+        self._disallow = self._compile(disallow)
+    
+    @staticmethod
+    def _compile(paths: Iterable[str]) -> Optional[Tuple[re.Pattern, Tuple[int, ...]]]:
+        """Merge rule paths into one regex plus the rule length of each alternative."""
+        # RobotFileParser percent-quotes rule paths, so '*' and '$' arrive as
+        # %2A and %24; lengths count them as the single characters they were
+        lengths = {path: len(unquote(path)) for path in set(paths)}
+        if not lengths:
+            return None
+        ordered = sorted(lengths, key=lengths.get, reverse=True)
+        
+        alternatives = []
+        for path in ordered:
+            anchored = path.endswith("%24")
+            if anchored:
+                path = path[:-3]
+            pattern = ".*".join(map(re.escape, path.split("%2A")))
+            alternatives.append(f"({pattern}{'$' if anchored else ''})")
+        return re.compile("|".join(alternatives)), tuple(lengths[path] for path in ordered)
+    
+    @staticmethod
+    def _longest_match(rules: Optional[Tuple[re.Pattern, Tuple[int, ...]]], path: str) -> int:
+        """Length of the longest rule matching path, or -1 if none does."""
+        if rules is None:
+            return -1
+        regex, lengths = rules
+        match = regex.match(path)
+        return lengths[match.lastindex - 1] if match else -1
+    
+    @classmethod
+    def from_parser(cls, parser: RobotFileParser, user_agent: str) -> "RobotsRules":
+        """Build rules from the group of a parsed robots.txt that applies to user_agent."""
+        entry = next(
+            (e for e in parser.entries if e.applies_to(user_agent)),
+            parser.default_entry
+        )
+        rulelines = entry.rulelines if entry else []
+        return cls(
+            allow=[r.path for r in rulelines if r.allowance],
+            disallow=[r.path for r in rulelines if not r.allowance]
+        )
+    
+    def can_fetch(self, url: str) -> bool:
+        """Check a URL against the rules."""
+        if self._disallow is None:
+            return True
+        
+        # Normalize the path the same way RobotFileParser quotes rule paths
+        parsed = urlparse(unquote(url))
+        path = quote(urlunparse(('', '', parsed.path, parsed.params, parsed.query, ''))) or "/"
+        
+        disallowed = self._longest_match(self._disallow, path)
+        if disallowed < 0:
+            return True
+        
+        return self._longest_match(self._allow, path) >= disallowed
+
 
 class RobotsHandler:
     """
@@ -28,25 +105,63 @@ class RobotsHandler:
     - Respects crawl delays
     - Handles malformed robots.txt files gracefully
     - Automatic cache expiration
+    - Can share the fetcher's HTTP client and connection pool
     """
     
     def __init__(self, config: CrawlerConfig):
         self.config = config
-        self.cache: Dict[str, RobotsTxtInfo] = {}
+        # LRU cache of robots.txt info, bounded by cache_max_size domains
+        self.cache: OrderedDict[str, RobotsTxtInfo] = OrderedDict()
+        self.cache_max_size = 10_000
+        # Compiled robots.txt rules per domain, queried for every URL path
+        self._rules: Dict[str, RobotsRules] = {}
         self.cache_expiry = timedelta(hours=24)  # Cache for 24 hours
+        self.min_cache_ttl = timedelta(seconds=60)  # Floor for short Cache-Control max-age
+        self.negative_cache_expiry = timedelta(minutes=10)  # Retry failed hosts after 10 minutes
         self.user_agent = config.user_agent
-        self._session: Optional[aiohttp.ClientSession] = None
+        self._session: Optional[httpx.AsyncClient] = None
+        self._owns_session = False
     
-    async def initialize(self):
-        """Initialize the robots handler."""
-        connector = aiohttp.TCPConnector(limit=100)
-        timeout = aiohttp.ClientTimeout(total=self.config.request_timeout)
-        self._session = aiohttp.ClientSession(
-            connector=connector,
-            timeout=timeout,
-            headers={"User-Agent": self.user_agent}
-        )
-        logger.info("Robots handler initialized")
+    async def initialize(self, session: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the robots handler.
+        
+        Args:
+            session: Shared HTTP client (e.g. Fetcher.session); a private
+                client is created on first use when omitted
+        """
+        if session is not None:
+            self._session = session
+            self._owns_session = False
+        logger.info("Robots handler initialized",
+                    enabled=self.config.respect_robots_txt,
+                    shared_session=session is not None)
+    
+    def _get_session(self) -> httpx.AsyncClient:
+        """
+        Return the HTTP client, creating a private one on first use.
+        
+        Nothing awaits between the check and the assignment, so concurrent
+        callers on the event loop can't create two clients. With
+        respect_robots_txt off no robots.txt is fetched and no pool is opened.
+        """
+        if self._session is None:
+            # Robots.txt is fetched once per host, so the pool is sized by the
+            # number of hosts rather than per-host concurrency
+            limits = httpx.Limits(
+                max_connections=self.config.connection_limit,
+                max_keepalive_connections=min(self.config.connection_limit or 100, 100),
+                keepalive_expiry=30
+            )
+            self._session = httpx.AsyncClient(
+                http2=True,
+                limits=limits,
+                timeout=httpx.Timeout(self.config.request_timeout),
+                headers={"User-Agent": self.user_agent},
+                follow_redirects=True
+            )
+            self._owns_session = True
+        return self._session
     
     async def can_fetch(self, url: str) -> bool:
         """
@@ -61,12 +176,12 @@ class RobotsHandler:
         if not self.config.respect_robots_txt:
             return True
         
-        domain = self._extract_domain(url)
+        domain = extract_domain(url)
         if not domain:
             return False
         
         robots_info = await self._get_robots_info(domain)
-        return robots_info.can_fetch if robots_info else True
+        return self._is_allowed(url, domain, robots_info)
     
     async def get_crawl_delay(self, url: str) -> float:
         """
@@ -81,11 +196,47 @@ class RobotsHandler:
         if not self.config.respect_robots_txt:
             return self.config.request_delay
         
-        domain = self._extract_domain(url)
+        domain = extract_domain(url)
         if not domain:
             return self.config.request_delay
         
         robots_info = await self._get_robots_info(domain)
+        return self._effective_delay(robots_info)
+    
+    async def inspect(self, url: str) -> Tuple[bool, float]:
+        """
+        Check a URL and get its crawl delay from a single robots.txt lookup.
+        
+        Args:
+            url: The URL to check
+            
+        Returns:
+            Tuple of (can fetch, crawl delay in seconds)
+        """
+        if not self.config.respect_robots_txt:
+            return True, self.config.request_delay
+        
+        domain = extract_domain(url)
+        if not domain:
+            return False, self.config.request_delay
+        
+        robots_info = await self._get_robots_info(domain)
+        return self._is_allowed(url, domain, robots_info), self._effective_delay(robots_info)
+    
+    def _is_allowed(self, url: str, domain: str, robots_info: Optional[RobotsTxtInfo]) -> bool:
+        """Apply a domain's robots.txt info to one URL."""
+        if not robots_info:
+            return True
+        
+        # Path-specific allow/disallow from the compiled rules
+        rules = self._rules.get(domain)
+        if rules is not None:
+            return rules.can_fetch(url)
+        
+        return robots_info.can_fetch
+    
+    def _effective_delay(self, robots_info: Optional[RobotsTxtInfo]) -> float:
+        """Crawl delay from robots.txt, never below the configured request delay."""
         if robots_info and robots_info.crawl_delay:
             return max(robots_info.crawl_delay, self.config.request_delay)
         
@@ -115,21 +266,36 @@ class RobotsHandler:
             RobotsTxtInfo or None if not available
         """
         # Check cache first
-        if domain in self.cache:
-            robots_info = self.cache[domain]
-            if datetime.now() - robots_info.last_fetched < self.cache_expiry:
+        robots_info = self.cache.get(domain)
+        if robots_info is not None:
+            if datetime.now() - robots_info.last_fetched < self._entry_ttl(robots_info):
+                self.cache.move_to_end(domain)
                 return robots_info
             else:
                 # Cache expired, remove from cache
                 del self.cache[domain]
+                self._rules.pop(domain, None)
         
         # Fetch new robots.txt
         robots_info = await self._fetch_robots_txt(domain)
         if robots_info:
             self.cache[domain] = robots_info
+            if len(self.cache) > self.cache_max_size:
+                # Evict the least recently used domain
+                evicted, _ = self.cache.popitem(last=False)
+                self._rules.pop(evicted, None)
         
         return robots_info
     
+    def _entry_ttl(self, robots_info: RobotsTxtInfo) -> timedelta:
+        """How long a cached robots.txt entry stays valid."""
+        if robots_info.failed:
+            return self.negative_cache_expiry
+        if robots_info.max_age is not None:
+            return min(max(timedelta(seconds=robots_info.max_age), self.min_cache_ttl),
+                       self.cache_expiry)
+        return self.cache_expiry
+    
     async def _fetch_robots_txt(self, domain: str) -> Optional[RobotsTxtInfo]:
         """
         Fetch and parse robots.txt for a domain.
@@ -143,31 +309,38 @@ class RobotsHandler:
         robots_url = f"https://{domain}/robots.txt"
         
         try:
-            async with self._session.get(robots_url) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    return await self._parse_robots_txt(domain, content)
-                elif response.status == 404:
-                    # No robots.txt means everything is allowed
-                    logger.debug("No robots.txt found, allowing all", domain=domain)
-                    return RobotsTxtInfo(
-                        domain=domain,
-                        can_fetch=True,
-                        crawl_delay=None,
-                        sitemap_urls=[]
-                    )
-                else:
-                    logger.warning("Failed to fetch robots.txt", 
-                                 domain=domain, status=response.status)
-                    # On error, be conservative and allow crawling
-                    return RobotsTxtInfo(
-                        domain=domain,
-                        can_fetch=True,
-                        crawl_delay=None,
-                        sitemap_urls=[]
-                    )
+            # The client may be shared, so identify as this crawler explicitly
+            response = await self._get_session().get(
+                robots_url, headers={"User-Agent": self.user_agent}
+            )
+            if response.status_code == 200:
+                robots_info = await self._parse_robots_txt(domain, response.text)
+                max_age = _MAX_AGE_RE.search(response.headers.get('cache-control', ''))
+                if max_age:
+                    robots_info.max_age = float(max_age.group(1))
+                return robots_info
+            elif response.status_code == 404:
+                # No robots.txt means everything is allowed
+                logger.debug("No robots.txt found, allowing all", domain=domain)
+                return RobotsTxtInfo(
+                    domain=domain,
+                    can_fetch=True,
+                    crawl_delay=None,
+                    sitemap_urls=[]
+                )
+            else:
+                logger.warning("Failed to fetch robots.txt", 
+                             domain=domain, status=response.status_code)
+                # On error, be conservative and allow crawling
+                return RobotsTxtInfo(
+                    domain=domain,
+                    can_fetch=True,
+                    crawl_delay=None,
+                    sitemap_urls=[],
+                    failed=True
+                )
         
-        except asyncio.TimeoutError:
+        except httpx.TimeoutException:
             logger.warning("Timeout fetching robots.txt", domain=domain)
         except Exception as e:
             logger.error("Error fetching robots.txt", domain=domain, error=str(e))
@@ -177,7 +350,8 @@ class RobotsHandler:
             domain=domain,
             can_fetch=True,
             crawl_delay=None,
-            sitemap_urls=[]
+            sitemap_urls=[],
+            failed=True
         )
     
     async def _parse_robots_txt(self, domain: str, content: str) -> RobotsTxtInfo:
@@ -192,38 +366,19 @@ class RobotsHandler:
             RobotsTxtInfo: Parsed robots.txt information
         """
         try:
-            # Use urllib's RobotFileParser for parsing
-            rp = RobotFileParser()
-            rp.set_url(f"https://{domain}/robots.txt")
-            
-            # Parse the content
-            lines = content.split('\n')
-            rp.read()  # This doesn't actually read, just initializes
-            
-            # Manually set the content
-            rp.modified()
-            for line in lines:
-                rp.read_line(line)
+            # Use urllib's RobotFileParser for parsing; parse() takes the lines
+            # we already downloaded (read() would fetch robots.txt again)
+            rp = RobotFileParser(f"https://{domain}/robots.txt")
+            rp.parse(content.splitlines())
             
             # Check if our user agent can fetch
             can_fetch = rp.can_fetch(self.user_agent, "/")
+            self._rules[domain] = RobotsRules.from_parser(rp, self.user_agent)
             
-            # Try to get crawl delay
-            crawl_delay = None
-            try:
-                crawl_delay = rp.crawl_delay(self.user_agent)
-            except AttributeError:
-                # crawl_delay method might not exist in older Python versions
-                pass
+            crawl_delay = rp.crawl_delay(self.user_agent)
             
-            # Extract sitemap URLs
-            sitemap_urls = []
-            for line in lines:
-                line = line.strip()
-                if line.lower().startswith('sitemap:'):
-                    sitemap_url = line[8:].strip()
-                    if sitemap_url:
-                        sitemap_urls.append(sitemap_url)
+            # Sitemap URLs are collected by the same parse pass
+            sitemap_urls = rp.site_maps() or []
             
             logger.debug("Parsed robots.txt", 
                         domain=domain, 
@@ -248,16 +403,9 @@ class RobotsHandler:
                 sitemap_urls=[]
             )
     
-    def _extract_domain(self, url: str) -> Optional[str]:
-        """Extract domain from URL."""
-        try:
-            parsed = urlparse(url)
-            return parsed.netloc.lower()
-        except Exception:
-            return None
-    
     async def cleanup(self):
         """Clean up resources."""
-        if self._session:
-            await self._session.close()
+        # A shared client is closed by its owner (the fetcher)
+        if self._session and self._owns_session:
+            await self._session.aclose()
         logger.info("Robots handler cleanup completed") 
\ No newline at end of file
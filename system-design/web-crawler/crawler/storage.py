@@ -5,10 +5,11 @@ This module handles storing crawled pages both in a database for metadata
 and in the file system for raw content.
 """
 
-import json
+import orjson
 import aiosqlite
+import zstandard as zstd
 import asyncio
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence, Set
 from pathlib import Path
 from datetime import datetime
 import hashlib
@@ -16,9 +17,32 @@ import structlog
 
 from .models import CrawledPage, CrawlResult
 from .config import CrawlerConfig
+from .urls import extract_domain
 
 logger = structlog.get_logger()
 
+# Page writes are committed in batches of up to this many pages...
+_WRITE_BATCH_SIZE = 100
+# ...or after this many seconds, whichever comes first
+_WRITE_FLUSH_INTERVAL = 0.2
+
+# Codec recorded in crawled_pages.content_encoding for compressed content files
+_CONTENT_ENCODING = "zstd"
+_ZSTD_LEVEL = 3
+
+# Columns search_pages may project, and the ones it returns by default
+_SEARCH_COLUMNS = frozenset({
+    "id", "url", "url_hash", "domain", "title", "content_type", "status_code",
+    "file_size", "content_hash", "meta_description", "meta_keywords",
+    "parent_url", "depth", "crawled_at", "links_count", "images_count",
+    "content_file_path", "metadata_file_path", "content_encoding",
+})
+DEFAULT_SEARCH_FIELDS = ("url", "domain", "title", "crawled_at", "depth", "content_type")
+
+# Stored in PRAGMA user_version; bump it and add a step to _migrate whenever
+# databases written by an earlier version need converting
+_SCHEMA_VERSION = 2
+
 
 class Storage:
     """
@@ -43,8 +67,27 @@ class Storage:
         self.total_stored = 0
         self.duplicate_content = 0
         
-        # Locks for thread safety
-        self.db_lock = asyncio.Lock()
+        # Bytes written under storage_dir, tracked as files are written so
+        # get_stats never has to walk the directory tree
+        self._storage_bytes = 0
+        
+        # Single long-lived connection; aiosqlite runs every statement on one
+        # worker thread, so writes are serialized without an extra lock
+        self._db: Optional[aiosqlite.Connection] = None
+        
+        # Database rows queued for the background writer
+        self._write_queue: asyncio.Queue = asyncio.Queue()
+        self._writer: Optional[asyncio.Task] = None
+        
+        # Content hashes already stored (or queued), for duplicate detection
+        self._content_hashes: Set[str] = set()
+        
+        # Shard directories already created, so mkdir runs once per shard
+        self._shard_dirs: Set[Path] = set()
+        
+        # zstd contexts for content files, created in initialize()
+        self._zctx: Optional[zstd.ZstdCompressor] = None
+        self._dctx: Optional[zstd.ZstdDecompressor] = None
     
     async def initialize(self):
         """Initialize storage directories and database."""
@@ -53,59 +96,105 @@ class Storage:
         self.content_dir.mkdir(exist_ok=True)
         self.metadata_dir.mkdir(exist_ok=True)
         
+        self._zctx = zstd.ZstdCompressor(level=_ZSTD_LEVEL)
+        self._dctx = zstd.ZstdDecompressor()
+        
         # Initialize database
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS crawled_pages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE NOT NULL,
-                    url_hash TEXT NOT NULL,
-                    domain TEXT NOT NULL,
-                    title TEXT,
-                    content_type TEXT,
-                    status_code INTEGER,
-                    file_size INTEGER,
-                    content_hash TEXT,
-                    meta_description TEXT,
-                    meta_keywords TEXT,
-                    parent_url TEXT,
-                    depth INTEGER,
-                    crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    links_count INTEGER DEFAULT 0,
-                    images_count INTEGER DEFAULT 0,
-                    content_file_path TEXT,
-                    metadata_file_path TEXT
-                )
-            """)
-            
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS extracted_links (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    source_url TEXT NOT NULL,
-                    target_url TEXT NOT NULL,
-                    link_text TEXT,
-                    discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (source_url) REFERENCES crawled_pages (url)
-                )
-            """)
-            
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS crawl_stats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    metric_name TEXT NOT NULL,
-                    metric_value TEXT NOT NULL,
-                    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create indexes
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_url_hash ON crawled_pages(url_hash)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_domain ON crawled_pages(domain)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON crawled_pages(content_hash)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_crawled_at ON crawled_pages(crawled_at)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_source_url ON extracted_links(source_url)")
-            
-            await db.commit()
+        self._db = await aiosqlite.connect(self.db_path)
+        await self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+            PRAGMA cache_size=-65536;
+        """)
+        
+        await self._db.execute("""
+            CREATE TABLE IF NOT EXISTS crawled_pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE NOT NULL,
+                url_hash TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                title TEXT,
+                content_type TEXT,
+                status_code INTEGER,
+                file_size INTEGER,
+                content_hash TEXT,
+                meta_description TEXT,
+                meta_keywords TEXT,
+                parent_url TEXT,
+                depth INTEGER,
+                crawled_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                links_count INTEGER DEFAULT 0,
+                images_count INTEGER DEFAULT 0,
+                content_file_path TEXT,
+                metadata_file_path TEXT,
+                content_encoding TEXT
+            )
+        """)
+        
+        await self._db.execute("""
+            CREATE TABLE IF NOT EXISTS extracted_links (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source_url TEXT NOT NULL,
+                target_url TEXT NOT NULL,
+                link_text TEXT,
+                discovered_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+                FOREIGN KEY (source_url) REFERENCES crawled_pages (url)
+            )
+        """)
+        
+        await self._db.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_stats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                metric_name TEXT NOT NULL,
+                metric_value TEXT NOT NULL,
+                recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        await self._migrate()
+        
+        # Create indexes
+        await self._db.execute("CREATE INDEX IF NOT EXISTS idx_url_hash ON crawled_pages(url_hash)")
+        # Per-domain bucket ordered by crawl time: search_pages(domain=...)
+        # walks just that domain's newest entries instead of sorting them all
+        await self._db.execute("DROP INDEX IF EXISTS idx_domain")
+        await self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_domain_crawled_at ON crawled_pages(domain, crawled_at)"
+        )
+        await self._db.execute("CREATE INDEX IF NOT EXISTS idx_content_hash ON crawled_pages(content_hash)")
+        await self._db.execute("CREATE INDEX IF NOT EXISTS idx_crawled_at ON crawled_pages(crawled_at)")
+        await self._db.execute("CREATE INDEX IF NOT EXISTS idx_source_url ON extracted_links(source_url)")
+        
+        await self._db.commit()
+        
+        # Load known content hashes once instead of querying per page
+        async with self._db.execute(
+            "SELECT DISTINCT content_hash FROM crawled_pages WHERE content_hash IS NOT NULL"
+        ) as cursor:
+            async for (content_hash,) in cursor:
+                self._content_hashes.add(content_hash)
+        
+        # Restore the storage size counter; databases that predate it get a
+        # one-off directory walk off the event loop
+        async with self._db.execute(
+            "SELECT metric_value FROM crawl_stats WHERE metric_name = 'storage_size_bytes' "
+            "ORDER BY id DESC LIMIT 1"
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row:
+            self._storage_bytes = int(row[0])
+        else:
+            self._storage_bytes = await asyncio.to_thread(self._walk_storage_size)
+            await self._db.execute(
+                "INSERT INTO crawl_stats (metric_name, metric_value) VALUES ('storage_size_bytes', ?)",
+                (str(self._storage_bytes),)
+            )
+            await self._db.commit()
+        
+        # Start the batching writer
+        self._writer = asyncio.create_task(self._flush_loop())
         
         logger.info("Storage initialized", 
                    storage_dir=str(self.storage_dir),
@@ -124,31 +213,33 @@ class Storage:
         try:
             # Generate hashes
             url_hash = self._hash_url(str(page.url))
-            content_hash = self._hash_content(page.content)
+            # Fetched pages carry the hash of their raw bytes; only hash here
+            # for pages built elsewhere
+            content_hash = page.content_hash or self._hash_content(page.content)
             
             # Check for duplicate content
             if await self._is_duplicate_content(content_hash):
                 self.duplicate_content += 1
                 logger.debug("Duplicate content detected", url=page.url)
                 # Still store metadata but don't store content file
-                return await self._store_metadata_only(page, url_hash, content_hash)
-            
-            # Store content file
-            content_file_path = await self._store_content_file(page, url_hash)
-            
-            # Store metadata file
-            metadata_file_path = await self._store_metadata_file(page, url_hash)
-            
-            # Store in database
-            await self._store_in_database(
-                page, url_hash, content_hash, 
-                content_file_path, metadata_file_path
-            )
-            
-            # Store extracted links
-            await self._store_links(page)
+                content_file_path = metadata_file_path = ""
+            else:
+                # Store content file
+                content_file_path = await self._store_content_file(page, url_hash)
+                
+                # Store metadata file
+                metadata_file_path = await self._store_metadata_file(page, url_hash)
+                
+                self.total_stored += 1
+                self._content_hashes.add(content_hash)
             
-            self.total_stored += 1
+            # Queue the page row and its links for the next batched commit
+            await self._write_queue.put((
+                self._page_row(page, url_hash, content_hash,
+                               content_file_path, metadata_file_path),
+                self._link_rows(page)
+            ))
+
             logger.debug("Page stored successfully", 
                         url=page.url, 
                         content_size=len(page.content),
@@ -171,14 +262,13 @@ class Storage:
             CrawledPage if found, None otherwise
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("""
-                    SELECT * FROM crawled_pages WHERE url = ?
-                """, (url,)) as cursor:
-                    row = await cursor.fetchone()
-                    
-                    if row:
-                        return await self._row_to_crawled_page(row)
+            async with self._db.execute("""
+                SELECT * FROM crawled_pages WHERE url = ?
+            """, (url,)) as cursor:
+                row = await cursor.fetchone()
+                
+                if row:
+                    return await self._row_to_crawled_page(row)
             
         except Exception as e:
             logger.error("Failed to retrieve page", url=url, error=str(e))
@@ -188,7 +278,8 @@ class Storage:
     async def search_pages(self, 
                           domain: Optional[str] = None,
                           limit: int = 100,
-                          offset: int = 0) -> List[Dict[str, Any]]:
+                          offset: int = 0,
+                          fields: Sequence[str] = DEFAULT_SEARCH_FIELDS) -> List[tuple]:
         """
         Search stored pages with filters.
         
@@ -196,12 +287,18 @@ class Storage:
             domain: Domain to filter by
             limit: Maximum number of results
             offset: Offset for pagination
+            fields: Columns to return, in order
             
         Returns:
-            List of page metadata
+            List of row tuples holding the requested fields
         """
+        unknown = set(fields) - _SEARCH_COLUMNS
+        if not fields or unknown:
+            raise ValueError(f"Invalid search fields: {sorted(unknown) or fields}")
+        
         try:
-            query = "SELECT * FROM crawled_pages"
+            # Field names are whitelisted above, so interpolation is safe
+            query = f"SELECT {', '.join(fields)} FROM crawled_pages"
             params = []
             
             if domain:
@@ -211,13 +308,9 @@ class Storage:
             query += " ORDER BY crawled_at DESC LIMIT ? OFFSET ?"
             params.extend([limit, offset])
             
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute(query, params) as cursor:
-                    rows = await cursor.fetchall()
-                    
-                    columns = [desc[0] for desc in cursor.description]
-                    return [dict(zip(columns, row)) for row in rows]
-                    
+            async with self._db.execute(query, params) as cursor:
+                return await cursor.fetchall()
+                
         except Exception as e:
             logger.error("Failed to search pages", error=str(e))
             return []
@@ -225,82 +318,122 @@ class Storage:
     async def get_stats(self) -> Dict[str, Any]:
         """Get storage statistics."""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Total pages
-                async with db.execute("SELECT COUNT(*) FROM crawled_pages") as cursor:
-                    total_pages = (await cursor.fetchone())[0]
-                
-                # Pages by domain
-                async with db.execute("""
-                    SELECT domain, COUNT(*) as count 
-                    FROM crawled_pages 
-                    GROUP BY domain 
-                    ORDER BY count DESC 
-                    LIMIT 10
-                """) as cursor:
-                    domain_stats = await cursor.fetchall()
-                
-                # Content types
-                async with db.execute("""
-                    SELECT content_type, COUNT(*) as count 
-                    FROM crawled_pages 
-                    GROUP BY content_type
-                """) as cursor:
-                    content_type_stats = await cursor.fetchall()
-                
-                # Total storage size
-                storage_size = sum(
-                    f.stat().st_size 
-                    for f in self.storage_dir.rglob('*') 
-                    if f.is_file()
-                )
-                
-                return {
-                    "total_pages": total_pages,
-                    "total_stored": self.total_stored,
-                    "duplicate_content": self.duplicate_content,
-                    "storage_size_bytes": storage_size,
-                    "storage_size_mb": round(storage_size / (1024 * 1024), 2),
-                    "domain_stats": dict(domain_stats),
-                    "content_type_stats": dict(content_type_stats)
-                }
-                
+            # Total pages
+            async with self._db.execute("SELECT COUNT(*) FROM crawled_pages") as cursor:
+                total_pages = (await cursor.fetchone())[0]
+            
+            # Pages by domain
+            async with self._db.execute("""
+                SELECT domain, COUNT(*) as count 
+                FROM crawled_pages 
+                GROUP BY domain 
+                ORDER BY count DESC 
+                LIMIT 10
+            """) as cursor:
+                domain_stats = await cursor.fetchall()
+            
+            # Content types
+            async with self._db.execute("""
+                SELECT content_type, COUNT(*) as count 
+                FROM crawled_pages 
+                GROUP BY content_type
+            """) as cursor:
+                content_type_stats = await cursor.fetchall()
+            
+            # Total storage size, tracked incrementally at write time
+            storage_size = self._storage_bytes
+            
+            return {
+                "total_pages": total_pages,
+                "total_stored": self.total_stored,
+                "duplicate_content": self.duplicate_content,
+                "storage_size_bytes": storage_size,
+                "storage_size_mb": round(storage_size / (1024 * 1024), 2),
+                "domain_stats": dict(domain_stats),
+                "content_type_stats": dict(content_type_stats)
+            }
+            
         except Exception as e:
             logger.error("Failed to get storage stats", error=str(e))
             return {}
     
+    async def _migrate(self):
+        """Bring a database written by an earlier version up to _SCHEMA_VERSION."""
+        async with self._db.execute("PRAGMA user_version") as cursor:
+            (version,) = await cursor.fetchone()
+        if version >= _SCHEMA_VERSION:
+            return
+        
+        if version < 1:
+            # crawled_at used to be a naive local-time ISO string and
+            # discovered_at SQLite's UTC CURRENT_TIMESTAMP; both are now
+            # Unix epoch seconds
+            await self._db.execute("""
+                UPDATE crawled_pages
+                SET crawled_at = CAST(strftime('%s', crawled_at, 'utc') AS INTEGER)
+                WHERE typeof(crawled_at) = 'text'
+            """)
+            await self._db.execute("""
+                UPDATE extracted_links
+                SET discovered_at = CAST(strftime('%s', discovered_at) AS INTEGER)
+                WHERE typeof(discovered_at) = 'text'
+            """)
+        
+        if version < 2:
+            # content_encoding arrived with compressed content files; rows
+            # from before it keep NULL, i.e. content stored as-is
+            async with self._db.execute("PRAGMA table_info(crawled_pages)") as cursor:
+                columns = {row[1] async for row in cursor}
+            if "content_encoding" not in columns:
+                await self._db.execute("ALTER TABLE crawled_pages ADD COLUMN content_encoding TEXT")
+        
+        await self._db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        await self._db.commit()
+        logger.info("Migrated storage schema", from_version=version, to_version=_SCHEMA_VERSION)
+    
+    def _walk_storage_size(self) -> int:
+        """Sum the size of every file under storage_dir (blocking)."""
+        return sum(
+            f.stat().st_size 
+            for f in self.storage_dir.rglob('*') 
+            if f.is_file()
+        )
+    
+    def _shard_dir(self, base_dir: Path, url_hash: str) -> Path:
+        """Return (creating it on first use) the shard directory for a URL hash."""
+        shard_dir = base_dir / url_hash[:2]
+        if shard_dir not in self._shard_dirs:
+            shard_dir.mkdir(exist_ok=True)
+            self._shard_dirs.add(shard_dir)
+        return shard_dir
+    
     def _hash_url(self, url: str) -> str:
         """Generate hash for URL."""
         return hashlib.sha256(url.encode()).hexdigest()[:16]
     
-    def _hash_content(self, content: str) -> str:
+    def _hash_content(self, content: bytes) -> str:
         """Generate hash for content."""
-        return hashlib.sha256(content.encode()).hexdigest()
+        return hashlib.sha256(content).hexdigest()
     
     async def _is_duplicate_content(self, content_hash: str) -> bool:
-        """Check if content hash already exists."""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("""
-                    SELECT 1 FROM crawled_pages WHERE content_hash = ? LIMIT 1
-                """, (content_hash,)) as cursor:
-                    return await cursor.fetchone() is not None
-                    
-        except Exception:
-            return False
+        """Check if content hash already exists (including pages still queued for writing)."""
+        return content_hash in self._content_hashes
     
     async def _store_content_file(self, page: CrawledPage, url_hash: str) -> str:
         """Store content in file system."""
-        content_file = self.content_dir / f"{url_hash}.html"
+        content_file = self._shard_dir(self.content_dir, url_hash) / f"{url_hash}.html.zst"
         
-        with open(content_file, 'w', encoding='utf-8') as f:
-            f.write(page.content)
+        # Compression is fast at level 3; only the disk write goes to a worker
+        # thread so it never blocks the event loop
+        data = self._zctx.compress(page.content)
+        await asyncio.to_thread(content_file.write_bytes, data)
+        self._storage_bytes += len(data)
         
         return str(content_file.relative_to(self.storage_dir))
     
     async def _store_metadata_file(self, page: CrawledPage, url_hash: str) -> str:
         """Store metadata in JSON file."""
-        metadata_file = self.metadata_dir / f"{url_hash}.json"
+        metadata_file = self._shard_dir(self.metadata_dir, url_hash) / f"{url_hash}.json"
         
         metadata = {
             "url": str(page.url),
@@ -310,7 +443,7 @@ class Storage:
             "links": page.links,
             "images": page.images,
             "headers": page.headers,
-            "crawled_at": page.crawled_at.isoformat(),
+            "crawled_at": page.crawled_at,  # orjson serializes datetime natively
             "parent_url": page.parent_url,
             "depth": page.depth,
             "status_code": page.status_code,
@@ -318,89 +451,144 @@ class Storage:
             "file_size": page.file_size
         }
         
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        data = orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+        await asyncio.to_thread(metadata_file.write_bytes, data)
+        self._storage_bytes += len(data)
         
         return str(metadata_file.relative_to(self.storage_dir))
     
-    async def _store_in_database(self, 
-                               page: CrawledPage,
-                               url_hash: str,
-                               content_hash: str,
-                               content_file_path: str,
-                               metadata_file_path: str):
-        """Store page metadata in database."""
-        from urllib.parse import urlparse
-        
-        domain = urlparse(str(page.url)).netloc.lower()
-        
-        async with self.db_lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR REPLACE INTO crawled_pages 
-                    (url, url_hash, domain, title, content_type, status_code, 
-                     file_size, content_hash, meta_description, meta_keywords,
-                     parent_url, depth, crawled_at, links_count, images_count,
-                     content_file_path, metadata_file_path)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    str(page.url), url_hash, domain, page.title,
-                    page.content_type, page.status_code, page.file_size,
-                    content_hash, page.meta_description, page.meta_keywords,
-                    page.parent_url, page.depth, page.crawled_at.isoformat(),
-                    len(page.links), len(page.images),
-                    content_file_path, metadata_file_path
-                ))
-                await db.commit()
+    def _page_row(self, 
+                  page: CrawledPage,
+                  url_hash: str,
+                  content_hash: str,
+                  content_file_path: str,
+                  metadata_file_path: str) -> tuple:
+        """Build the crawled_pages row for a page."""
+        domain = page.domain or extract_domain(page.url)
+        
+        return (
+            str(page.url), url_hash, domain, page.title,
+            page.content_type, page.status_code, page.file_size,
+            content_hash, page.meta_description, page.meta_keywords,
+            page.parent_url, page.depth, int(page.crawled_at.timestamp()),
+            len(page.links), len(page.images),
+            content_file_path, metadata_file_path,
+            _CONTENT_ENCODING if content_file_path else None
+        )
+    
+    def _link_rows(self, page: CrawledPage) -> List[tuple]:
+        """Build the extracted_links rows for a page."""
+        source_url = str(page.url)
+        # Set explicitly: tables migrated from the text schema keep their
+        # CURRENT_TIMESTAMP column default
+        discovered_at = int(page.crawled_at.timestamp())
+        return [(source_url, link, "", discovered_at) for link in page.links]
     
-    async def _store_metadata_only(self, 
-                                 page: CrawledPage,
-                                 url_hash: str,
-                                 content_hash: str) -> bool:
-        """Store only metadata for duplicate content."""
+    async def _flush_loop(self):
+        """Background writer: drain the queue and commit pages in batches."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._write_queue.get()]
+            deadline = loop.time() + _WRITE_FLUSH_INTERVAL
+            
+            # Keep collecting until the batch is full or the interval elapses
+            while len(batch) < _WRITE_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                logger.error("Failed to write page batch", pages=len(batch), error=str(e))
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    async def _write_batch(self, batch: List[tuple]):
+        """Write a batch of pages and their links in a single transaction."""
+        page_rows = [page_row for page_row, _ in batch]
+        link_rows = [row for _, rows in batch for row in rows]
+        
         try:
-            await self._store_in_database(
-                page, url_hash, content_hash, "", ""
+            # Take the write lock up front so the whole batch (pages, links and
+            # the size counter) is one transaction with a single fsync
+            await self._db.execute("BEGIN IMMEDIATE")
+            await self._db.executemany("""
+                INSERT OR REPLACE INTO crawled_pages 
+                (url, url_hash, domain, title, content_type, status_code, 
+                 file_size, content_hash, meta_description, meta_keywords,
+                 parent_url, depth, crawled_at, links_count, images_count,
+                 content_file_path, metadata_file_path, content_encoding)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, page_rows)
+            
+            if link_rows:
+                await self._db.executemany("""
+                    INSERT OR IGNORE INTO extracted_links 
+                    (source_url, target_url, link_text, discovered_at)
+                    VALUES (?, ?, ?, ?)
+                """, link_rows)
+            
+            # Persist the storage size counter alongside the pages it covers
+            await self._db.execute(
+                "UPDATE crawl_stats SET metric_value = ?, recorded_at = CURRENT_TIMESTAMP "
+                "WHERE metric_name = 'storage_size_bytes'",
+                (str(self._storage_bytes),)
             )
-            await self._store_links(page)
-            return True
-        except Exception as e:
-            logger.error("Failed to store metadata only", error=str(e))
-            return False
-    
-    async def _store_links(self, page: CrawledPage):
-        """Store extracted links in database."""
-        if not page.links:
-            return
+            
+            await self._db.commit()
+        except Exception:
+            await self._db.rollback()
+            raise
         
-        async with self.db_lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                for link in page.links:
-                    await db.execute("""
-                        INSERT OR IGNORE INTO extracted_links 
-                        (source_url, target_url, link_text)
-                        VALUES (?, ?, ?)
-                    """, (str(page.url), link, ""))
-                await db.commit()
+        logger.debug("Committed page batch", pages=len(page_rows), links=len(link_rows))
     
     async def _row_to_crawled_page(self, row) -> CrawledPage:
         """Convert database row to CrawledPage object."""
-        # This is a simplified version - in practice you might want to
-        # load the full content from the file system
+        content_file_path, content_encoding = row[16], row[18]
+        content = b""
+        if content_file_path:
+            content = await asyncio.to_thread((self.storage_dir / content_file_path).read_bytes)
+            if content_encoding == _CONTENT_ENCODING:
+                content = self._dctx.decompress(content)
+        
         return CrawledPage(
             url=row[1],  # url
             status_code=row[6],  # status_code
             content_type=row[5],  # content_type
-            content="",  # Would load from file
+            content=content,  # loaded from the content file
             title=row[4],  # title
             meta_description=row[9],  # meta_description
             meta_keywords=row[10],  # meta_keywords
             parent_url=row[11],  # parent_url
             depth=row[12],  # depth
             file_size=row[7],  # file_size
-            crawled_at=datetime.fromisoformat(row[13])  # crawled_at
+            crawled_at=datetime.fromtimestamp(row[13])  # crawled_at (Unix epoch)
         )
     
+    async def flush(self):
+        """Wait until every queued page has been committed to the database."""
+        if self._writer:
+            await self._write_queue.join()
+    
     async def cleanup(self):
         """Clean up resources."""
+        if self._writer:
+            await self.flush()
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        
+        if self._db:
+            await self._db.close()
+            self._db = None
         logger.info("Storage cleanup completed") 
\ No newline at end of file
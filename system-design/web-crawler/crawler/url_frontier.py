@@ -6,18 +6,48 @@ requests to the same domain and manages URL prioritization.
 """
 
 import asyncio
+import heapq
+import time
 import aiosqlite
-from typing import Optional, Set, Dict
+from pybloom_live import ScalableBloomFilter
+from typing import Optional, Dict, List, Set, Tuple
 from collections import defaultdict, deque
-from urllib.parse import urlparse
 from datetime import datetime, timedelta
 import structlog
 
 from .models import UrlInfo
 from .config import CrawlerConfig
+from .urls import extract_domain
 
 logger = structlog.get_logger()
 
+# Status updates are committed in batches of up to this many rows...
+_STATUS_BATCH_SIZE = 500
+# ...or after this many seconds, whichever comes first
+_STATUS_FLUSH_INTERVAL = 0.1
+
+# Hot-path statements, defined once so every call hands sqlite3 the same
+# text and hits the connection's prepared-statement cache
+_INSERT_URL_SQL = (
+    "INSERT OR IGNORE INTO url_queue "
+    "(url, domain, depth, priority, parent_url, discovered_at) "
+    "VALUES {} RETURNING url"
+)
+# Rows per multi-row INSERT; 6 parameters each stays well under SQLite's
+# default limit of 32766 bound parameters per statement
+_INSERT_CHUNK_ROWS = 500
+_UPDATE_STATUS_SQL = "UPDATE url_queue SET status = ? WHERE url = ?"
+_SELECT_DOMAIN_PENDING_SQL = (
+    "SELECT url, depth, priority, parent_url, discovered_at "
+    "FROM url_queue "
+    "WHERE domain = ? AND status = 'pending' "
+    "ORDER BY priority DESC, discovered_at "
+    "LIMIT ?"
+)
+
+# Seconds between WAL checkpoints that truncate the frontier's write-ahead log
+_CHECKPOINT_INTERVAL = 60
+
 
 class UrlFrontier:
     """
@@ -29,52 +59,129 @@ class UrlFrontier:
     - Persistent storage with SQLite
     - Deduplication
     - Rate limiting per domain
+    
+    Durability: the queue can always be rebuilt by re-crawling, so its
+    database runs with synchronous=OFF. A power loss or OS crash may drop the
+    most recent writes (some URLs get crawled again); the WAL is checkpointed
+    and truncated periodically.
     """
     
     def __init__(self, config: CrawlerConfig):
         self.config = config
-        self.db_path = "crawler_frontier.db"
+        self.db_path = str(config.frontier_db_path)
         
         # In-memory structures for active crawling
         self.domain_queues: Dict[str, deque] = defaultdict(deque)
-        self.last_access_time: Dict[str, datetime] = {}
-        self.seen_urls: Set[str] = set()
+        # Domains with pending URLs that overflowed domain_queue_cap and so
+        # live only in the database until the in-memory queue drains
+        self._spilled_domains: Set[str] = set()
+        # Min-heap of (next allowed fetch time, domain), holding exactly one
+        # entry per domain with queued URLs; times are time.monotonic()
+        self._ready_heap: List[Tuple[float, str]] = []
+        self._next_allowed: Dict[str, float] = {}
+        # Bloom filter instead of a set of URL strings: ~3 bytes per URL. A
+        # false positive skips an unseen URL (about 1 in 100k); the UNIQUE url
+        # column with INSERT OR IGNORE stays the authoritative dedupe
+        self.seen_urls = ScalableBloomFilter(initial_capacity=1_000_000, error_rate=1e-5)
         self.total_urls = 0
         
-        # Locks for thread safety
-        self.domain_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
-        self.global_lock = asyncio.Lock()
+        # Keyset position (priority, discovered_at, id) of the last pending row
+        # loaded from the database, and whether more may remain beyond it
+        self._load_position: Optional[Tuple[int, str, int]] = None
+        self._more_pending = True
+        
+        # Set whenever a domain is (re)scheduled, to wake an idle dispatcher
+        self._url_available = asyncio.Event()
+        
+        # Row count per status, seeded from the table at startup and then
+        # kept current as URLs are inserted, claimed and completed
+        self._status_counts: Dict[str, int] = defaultdict(int)
+        
+        # The in-memory structures above are only touched between awaits on
+        # the event loop, so they need no locks; only disk writes wait below
+        
+        # Single long-lived connection. Statements already run one at a time
+        # on aiosqlite's worker thread; the lock keeps each write transaction
+        # (BEGIN ... COMMIT) from interleaving with another writer's
+        self._db: Optional[aiosqlite.Connection] = None
+        self._db_lock = asyncio.Lock()
+        
+        # (status, url) updates queued for the background flusher; losing
+        # them in a crash only means a URL gets crawled again
+        self._status_queue: asyncio.Queue = asyncio.Queue()
+        self._status_flusher_task: Optional[asyncio.Task] = None
+        self._checkpoint_task: Optional[asyncio.Task] = None
+    
+    async def _configure_conn(self, db: aiosqlite.Connection):
+        """Apply WAL mode and tuning pragmas to a freshly opened connection."""
+        await db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=OFF;
+            PRAGMA cache_size=-64000;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+            PRAGMA busy_timeout=5000;
+        """)
     
     async def initialize(self):
         """Initialize the frontier database."""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS url_queue (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE NOT NULL,
-                    domain TEXT NOT NULL,
-                    depth INTEGER NOT NULL,
-                    priority INTEGER DEFAULT 0,
-                    parent_url TEXT,
-                    discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    status TEXT DEFAULT 'pending'
-                )
-            """)
-            
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_domain_priority 
-                ON url_queue(domain, priority DESC, discovered_at)
-            """)
-            
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_status 
-                ON url_queue(status)
-            """)
-            
-            await db.commit()
+        self._db = await aiosqlite.connect(self.db_path)
+        await self._configure_conn(self._db)
+        
+        await self._db.execute("""
+            CREATE TABLE IF NOT EXISTS url_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE NOT NULL,
+                domain TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                priority INTEGER DEFAULT 0,
+                parent_url TEXT,
+                discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                status TEXT DEFAULT 'pending'
+            )
+        """)
+        
+        await self._db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_domain_priority 
+            ON url_queue(domain, priority DESC, discovered_at)
+        """)
+        
+        await self._db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_status 
+            ON url_queue(status)
+        """)
+        
+        # Partial index matching _load_pending_urls' filter and sort order. The
+        # planner prefers idx_status (kept for get_stats) without ANALYZE data,
+        # so that query names this index explicitly
+        await self._db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_pending 
+            ON url_queue(priority DESC, discovered_at) 
+            WHERE status = 'pending'
+        """)
+        
+        await self._db.commit()
+        
+        # Claims are only recorded in memory and by the batched status
+        # flusher, so URLs a previous run claimed but never finished go back
+        # to pending rather than being lost
+        await self._db.execute(
+            "UPDATE url_queue SET status = 'pending' WHERE status = 'in_progress'"
+        )
+        await self._db.commit()
+        
+        async with self._db.execute(
+            "SELECT status, COUNT(*) FROM url_queue GROUP BY status"
+        ) as cursor:
+            async for status, count in cursor:
+                self._status_counts[status] = count
         
         # Load pending URLs into memory
         await self._load_pending_urls()
+        
+        # Start the status update flusher
+        self._status_flusher_task = asyncio.create_task(self._status_flusher())
+        self._checkpoint_task = asyncio.create_task(self._checkpoint_loop())
         logger.info("URL Frontier initialized", total_urls=self.total_urls)
     
     async def add_url(self, url_info: UrlInfo) -> bool:
@@ -87,31 +194,64 @@ class UrlFrontier:
         Returns:
             bool: True if URL was added, False if already seen
         """
-        url = url_info.url
-        
-        # Check if already seen
-        if url in self.seen_urls:
-            return False
+        return await self.add_urls([url_info]) == 1
+    
+    async def add_urls(self, url_infos: List[UrlInfo]) -> int:
+        """
+        Add a batch of URLs to the frontier, persisting them in one transaction.
         
-        # Extract domain
-        domain = self._extract_domain(url)
-        if not domain:
-            logger.warning("Invalid URL, skipping", url=url)
-            return False
+        Args:
+            url_infos: URL information to add
+            
+        Returns:
+            int: Number of URLs added (those not already stored)
+        """
+        candidates: Dict[str, Tuple[str, UrlInfo]] = {}
         
-        async with self.global_lock:
-            # Add to seen set
-            self.seen_urls.add(url)
+        for url_info in url_infos:
+            url = url_info.url
             
-            # Add to domain queue
-            self.domain_queues[domain].append(url_info)
-            self.total_urls += 1
+            # Check if already seen
+            if url in self.seen_urls or url in candidates:
+                continue
+            
+            # Extract domain
+            domain = extract_domain(url)
+            if not domain:
+                logger.warning("Invalid URL, skipping", url=url)
+                continue
+            
+            candidates[url] = (domain, url_info)
+        
+        if not candidates:
+            return 0
         
-        # Persist to database
-        await self._persist_url(url_info, domain)
+        # Persist first: memory only takes the rows the database actually
+        # inserted, so a failed transaction leaves both unchanged and rows
+        # stored by an earlier batch or run aren't queued twice
+        inserted = await self._persist_urls([
+            (
+                url,
+                domain,
+                url_info.depth,
+                url_info.priority,
+                url_info.parent_url,
+                url_info.discovered_at.isoformat()
+            )
+            for url, (domain, url_info) in candidates.items()
+        ])
+        if inserted is None:
+            return 0
         
-        logger.debug("URL added to frontier", url=url, domain=domain, depth=url_info.depth)
-        return True
+        # Rows stored by an earlier run stay unseen: pending ones are queued
+        # when the keyset loader reaches them, which skips seen URLs
+        for url, (domain, url_info) in candidates.items():
+            if url in inserted:
+                self.seen_urls.add(url)
+                self._enqueue(domain, url_info)
+        
+        logger.debug("URLs added to frontier", count=len(inserted))
+        return len(inserted)
     
     async def get_next_url(self) -> Optional[UrlInfo]:
         """
@@ -120,34 +260,61 @@ class UrlFrontier:
         Returns:
             UrlInfo: Next URL to crawl, or None if none available
         """
-        now = datetime.now()
+        # Top up from the database once the in-memory backlog runs low (at
+        # the latest when it is empty, however small the batch size)
+        if self._more_pending and self.total_urls < max(1, self.config.frontier_load_batch_size // 4):
+            await self._load_pending_urls()
         
-        # Find a domain that can be crawled (respecting delays)
-        for domain, queue in self.domain_queues.items():
-            if not queue:
-                continue
-            
-            # Check if enough time has passed since last access
-            last_access = self.last_access_time.get(domain)
-            if last_access:
-                time_since_last = (now - last_access).total_seconds()
-                if time_since_last < self.config.request_delay:
-                    continue
-            
-            async with self.domain_locks[domain]:
-                if queue:
-                    url_info = queue.popleft()
-                    self.last_access_time[domain] = now
-                    self.total_urls -= 1
-                    
-                    # Mark as in progress in database
-                    await self._update_url_status(url_info.url, 'in_progress')
-                    
-                    logger.debug("URL retrieved from frontier", 
-                               url=url_info.url, domain=domain)
-                    return url_info
+        # Only the heap top can be due; if it isn't, no domain is
+        now = time.monotonic()
+        if not self._ready_heap or self._ready_heap[0][0] > now:
+            return None
+        
+        _, domain = heapq.heappop(self._ready_heap)
+        queue = self.domain_queues[domain]
+        url_info = queue.popleft()
+        self.total_urls -= 1
+        
+        # Next request to this domain waits out the politeness delay
+        next_allowed = now + self.config.request_delay
+        self._next_allowed[domain] = next_allowed
+        if queue:
+            heapq.heappush(self._ready_heap, (next_allowed, domain))
+        
+        # Mark as in progress in database
+        await self._update_url_status(url_info.url, 'in_progress')
+        self._status_counts['pending'] -= 1
+        self._status_counts['in_progress'] += 1
         
-        return None
+        # A capped domain whose in-memory queue just drained reloads from disk
+        if not queue and domain in self._spilled_domains:
+            await self._refill_domain(domain)
+        
+        logger.debug("URL retrieved from frontier", 
+                   url=url_info.url, domain=domain)
+        return url_info
+    
+    async def wait_for_url(self, timeout: float):
+        """
+        Wait until get_next_url may have something to return.
+        
+        Returns when a new domain is scheduled, when the earliest scheduled
+        domain's politeness delay expires, or after timeout seconds.
+        
+        Args:
+            timeout: Maximum time to wait (seconds)
+        """
+        if self._ready_heap:
+            timeout = min(timeout, max(0.0, self._ready_heap[0][0] - time.monotonic()))
+        elif self._more_pending:
+            # More stored URLs can be loaded right away
+            return
+        
+        self._url_available.clear()
+        try:
+            await asyncio.wait_for(self._url_available.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
     
     async def mark_completed(self, url: str, success: bool = True):
         """
@@ -159,94 +326,211 @@ class UrlFrontier:
         """
         status = 'success' if success else 'failed'
         await self._update_url_status(url, status)
+        self._status_counts['in_progress'] -= 1
+        self._status_counts[status] += 1
         logger.debug("URL marked as completed", url=url, success=success)
     
     async def get_stats(self) -> Dict[str, int]:
         """Get frontier statistics."""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("""
-                SELECT status, COUNT(*) as count 
-                FROM url_queue 
-                GROUP BY status
-            """) as cursor:
-                stats = {}
-                async for row in cursor:
-                    stats[row[0]] = row[1]
-        
+        stats = dict(self._status_counts)
         stats['in_memory'] = self.total_urls
         stats['domains'] = len(self.domain_queues)
         return stats
     
-    def _extract_domain(self, url: str) -> Optional[str]:
-        """Extract domain from URL."""
-        try:
-            parsed = urlparse(url)
-            return parsed.netloc.lower()
-        except Exception:
-            return None
+    def _enqueue(self, domain: str, url_info: UrlInfo):
+        """
+        Append a URL to its domain queue, scheduling the domain if it was idle.
+        
+        A full queue leaves the URL in the database only (it is always
+        persisted) and marks the domain for a refill once it drains.
+        """
+        queue = self.domain_queues[domain]
+        if len(queue) >= self.config.domain_queue_cap:
+            self._spilled_domains.add(domain)
+            return
+        if not queue:
+            ready_at = max(time.monotonic(), self._next_allowed.get(domain, 0.0))
+            heapq.heappush(self._ready_heap, (ready_at, domain))
+            self._url_available.set()
+        queue.append(url_info)
+        self.total_urls += 1
     
     async def _load_pending_urls(self):
-        """Load pending URLs from database into memory."""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("""
-                SELECT url, depth, priority, parent_url, discovered_at
-                FROM url_queue 
-                WHERE status = 'pending'
-                ORDER BY priority DESC, discovered_at
-            """) as cursor:
-                async for row in cursor:
-                    url, depth, priority, parent_url, discovered_at = row
-                    domain = self._extract_domain(url)
+        """
+        Load the next batch of pending URLs from database into memory.
+        
+        Rows are paged by keyset on (priority, discovered_at, id), so memory
+        holds at most a batch of the stored backlog and the database stays the
+        source of truth for the rest. Rows already seen (e.g. rediscovered
+        during this run) are skipped.
+        """
+        batch_size = self.config.frontier_load_batch_size
+        query = """
+            SELECT url, depth, priority, parent_url, discovered_at, id
+            FROM url_queue INDEXED BY idx_pending
+            WHERE status = 'pending'
+        """
+        params: list = []
+        if self._load_position is not None:
+            priority, discovered_at, row_id = self._load_position
+            query += """
+            AND priority <= ? AND (priority < ? OR (discovered_at, id) > (?, ?))
+            """
+            params = [priority, priority, discovered_at, row_id]
+        query += " ORDER BY priority DESC, discovered_at, id LIMIT ?"
+        params.append(batch_size)
+        
+        loaded = 0
+        async with self._db.execute(query, params) as cursor:
+            async for row in cursor:
+                url, depth, priority, parent_url, discovered_at, row_id = row
+                loaded += 1
+                self._load_position = (priority, discovered_at, row_id)
+                
+                if url in self.seen_urls:
+                    continue
+                
+                domain = extract_domain(url)
+                if domain:
+                    url_info = UrlInfo(
+                        url=url,
+                        depth=depth,
+                        parent_url=parent_url,
+                        priority=priority,
+                        discovered_at=datetime.fromisoformat(discovered_at)
+                    )
                     
-                    if domain:
-                        url_info = UrlInfo(
-                            url=url,
-                            depth=depth,
-                            parent_url=parent_url,
-                            priority=priority,
-                            discovered_at=datetime.fromisoformat(discovered_at)
-                        )
-                        
-                        self.domain_queues[domain].append(url_info)
-                        self.seen_urls.add(url)
-                        self.total_urls += 1
-    
-    async def _persist_url(self, url_info: UrlInfo, domain: str):
-        """Persist URL to database."""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR IGNORE INTO url_queue 
-                    (url, domain, depth, priority, parent_url, discovered_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    url_info.url,
-                    domain,
-                    url_info.depth,
-                    url_info.priority,
-                    url_info.parent_url,
-                    url_info.discovered_at.isoformat()
-                ))
-                await db.commit()
-        except Exception as e:
-            logger.error("Failed to persist URL", url=url_info.url, error=str(e))
+                    self._enqueue(domain, url_info)
+                    self.seen_urls.add(url)
+        
+        self._more_pending = loaded == batch_size
+    
+    async def _refill_domain(self, domain: str):
+        """Reload a drained domain queue with its next pending URLs from the database."""
+        # Claimed URLs must be marked in_progress on disk before re-reading
+        await self.flush()
+        
+        cap = self.config.domain_queue_cap
+        async with self._db.execute(_SELECT_DOMAIN_PENDING_SQL, (domain, cap)) as cursor:
+            rows = await cursor.fetchall()
+        
+        if len(rows) < cap:
+            self._spilled_domains.discard(domain)
+        
+        # URLs added to the queue while the query ran are already in memory
+        queue = self.domain_queues[domain]
+        queued = {url_info.url for url_info in queue}
+        for url, depth, priority, parent_url, discovered_at in rows:
+            if url in queued:
+                continue
+            self._enqueue(domain, UrlInfo(
+                url=url,
+                depth=depth,
+                parent_url=parent_url,
+                priority=priority,
+                discovered_at=datetime.fromisoformat(discovered_at)
+            ))
+            self.seen_urls.add(url)
+    
+    async def _persist_urls(self, rows: List[tuple]) -> Optional[Set[str]]:
+        """
+        Persist a batch of URL rows to the database in a single transaction.
+        
+        Returns:
+            The URLs actually inserted (rows already stored are ignored), or
+            None if the transaction failed and was rolled back
+        """
+        inserted: Set[str] = set()
+        async with self._db_lock:
+            try:
+                await self._db.execute("BEGIN")
+                for start in range(0, len(rows), _INSERT_CHUNK_ROWS):
+                    chunk = rows[start:start + _INSERT_CHUNK_ROWS]
+                    sql = _INSERT_URL_SQL.format(", ".join(["(?, ?, ?, ?, ?, ?)"] * len(chunk)))
+                    params = [value for row in chunk for value in row]
+                    async with self._db.execute(sql, params) as cursor:
+                        inserted.update(url for (url,) in await cursor.fetchall())
+                await self._db.commit()
+            except Exception as e:
+                await self._db.rollback()
+                logger.error("Failed to persist URLs", count=len(rows), error=str(e))
+                return None
+        
+        self._status_counts['pending'] += len(inserted)
+        return inserted
     
     async def _update_url_status(self, url: str, status: str):
-        """Update URL status in database."""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    UPDATE url_queue SET status = ? WHERE url = ?
-                """, (status, url))
-                await db.commit()
-        except Exception as e:
-            logger.error("Failed to update URL status", 
-                        url=url, status=status, error=str(e))
+        """Queue a URL status update for the background flusher."""
+        self._status_queue.put_nowait((status, url))
+    
+    async def _status_flusher(self):
+        """Background writer: drain queued status updates and commit them in batches."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._status_queue.get()]
+            deadline = loop.time() + _STATUS_FLUSH_INTERVAL
+            
+            # Keep collecting until the batch is full or the interval elapses
+            while len(batch) < _STATUS_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._status_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                async with self._db_lock:
+                    await self._db.executemany(_UPDATE_STATUS_SQL, batch)
+                    await self._db.commit()
+            except Exception as e:
+                logger.error("Failed to update URL statuses", 
+                            count=len(batch), error=str(e))
+            finally:
+                for _ in batch:
+                    self._status_queue.task_done()
+    
+    async def _checkpoint_loop(self):
+        """Periodically checkpoint the WAL into the database and truncate it."""
+        while True:
+            await asyncio.sleep(_CHECKPOINT_INTERVAL)
+            try:
+                async with self._db_lock:
+                    await self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except Exception as e:
+                logger.error("Failed to checkpoint frontier WAL", error=str(e))
+    
+    async def flush(self):
+        """Wait until every queued status update has been committed."""
+        if self._status_flusher_task:
+            await self._status_queue.join()
     
     async def is_empty(self) -> bool:
         """Check if frontier is empty."""
-        return self.total_urls == 0
+        return self.total_urls == 0 and not self._more_pending and not self._spilled_domains
     
     async def cleanup(self):
         """Clean up resources."""
+        if self._status_flusher_task:
+            await self.flush()
+            self._status_flusher_task.cancel()
+            try:
+                await self._status_flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._status_flusher_task = None
+        
+        if self._checkpoint_task:
+            self._checkpoint_task.cancel()
+            try:
+                await self._checkpoint_task
+            except asyncio.CancelledError:
+                pass
+            self._checkpoint_task = None
+        
+        if self._db:
+            await self._db.close()
+            self._db = None
         logger.info("URL Frontier cleanup completed") 
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+URL helpers shared by the crawler components.
+
+Domains are looked up for every URL the frontier, robots handler and fetcher
+touch, so the common absolute-URL case is sliced with one regex match instead
+of a full urlparse.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import urlparse
+
+# Authority of an absolute URL: everything between "scheme://" and the path
+AUTHORITY_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)')
+
+
+@lru_cache(maxsize=1 << 17)
+def extract_domain(url: str) -> Optional[str]:
+    """Extract the lower-cased domain (netloc) from a URL (memoized)."""
+    match = AUTHORITY_RE.match(url)
+    if match:
+        return match.group(1).lower()
+    
+    try:
+        return urlparse(url).netloc.lower()
+    except Exception:
+        return None
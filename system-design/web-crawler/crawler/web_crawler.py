@@ -6,9 +6,14 @@ web crawler following distributed systems design principles.
 """
 
 import asyncio
+import multiprocessing
+import os
 import time
+from datetime import datetime
+from concurrent.futures import Executor, ProcessPoolExecutor
 from typing import List, Optional, Dict, Any
 from urllib.parse import urlparse
+import httpx
 import structlog
 
 from .config import CrawlerConfig
@@ -21,6 +26,10 @@ from .storage import Storage
 
 logger = structlog.get_logger()
 
+# Upper bound on one idle wait for the frontier; it normally wakes the
+# dispatcher earlier, when a domain becomes due or new URLs arrive
+_IDLE_WAIT_TIMEOUT = 5.0
+
 
 class WebCrawler:
     """
@@ -34,22 +43,36 @@ class WebCrawler:
     - Configurable crawling parameters
     """
     
-    def __init__(self, config: CrawlerConfig):
+    def __init__(self,
+                 config: CrawlerConfig,
+                 session: Optional[httpx.AsyncClient] = None,
+                 storage: Optional[Storage] = None,
+                 parse_executor: Optional[Executor] = None):
         self.config = config
         
         # Initialize components
         self.url_frontier = UrlFrontier(config)
         self.robots_handler = RobotsHandler(config)
-        self.fetcher = Fetcher(config)
+        # An injected session is shared across crawlers and closed by its owner
+        self.fetcher = Fetcher(config, session=session)
         self.parser = Parser(config)
-        self.storage = Storage(config)
+        # Likewise an injected storage is already initialized and outlives
+        # this crawler, so several crawls can write to one database
+        self.storage = storage or Storage(config)
+        self._owns_storage = storage is None
         
         # Crawler state
         self.is_running = False
         self.start_time = None
         self.pages_crawled = 0
         self.pages_stored = 0
-        self.crawl_semaphore = asyncio.Semaphore(config.max_concurrent_requests)
+        # URLs handed to workers and not yet finished; they count against
+        # max_pages until they turn out not to yield a page
+        self.urls_in_flight = 0
+        # CPU-bound HTML parsing runs in worker processes, off the event loop;
+        # an injected pool is shared with other crawlers and shut down by its owner
+        self.parse_executor: Optional[Executor] = parse_executor
+        self._owns_parse_executor = parse_executor is None
         
         # Statistics
         self.stats = {
@@ -68,9 +91,18 @@ class WebCrawler:
         logger.info("Initializing web crawler", config=self.config.dict())
         
         await self.url_frontier.initialize()
-        await self.robots_handler.initialize()
         await self.fetcher.initialize()
-        await self.storage.initialize()
+        # robots.txt requests share the fetcher's HTTP/2 connection pool
+        await self.robots_handler.initialize(session=self.fetcher.session)
+        if self._owns_storage:
+            await self.storage.initialize()
+        
+        if self._owns_parse_executor:
+            # Spawned (not forked) workers: the parent already runs aiosqlite threads
+            self.parse_executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
         
         logger.info("Web crawler initialized successfully")
     
@@ -94,19 +126,37 @@ class WebCrawler:
         try:
             logger.info("Starting crawl", seed_urls=seed_urls)
             
-            # Add seed URLs to frontier
-            for url in seed_urls:
-                url_info = UrlInfo(url=url, depth=0, priority=100)
-                await self.url_frontier.add_url(url_info)
+            # Add seed URLs to frontier in a single transaction
+            await self.url_frontier.add_urls(
+                [UrlInfo(url=url, depth=0, priority=100) for url in seed_urls]
+            )
             
-            # Start crawler workers
-            tasks = []
-            for i in range(self.config.max_concurrent_requests):
-                task = asyncio.create_task(self._crawler_worker(f"worker-{i}"))
-                tasks.append(task)
+            # Long-lived workers pull from a bounded queue fed by the dispatcher.
+            # Only the fetch step is bounded by max_concurrent_requests (the
+            # fetcher's semaphore), so extra workers keep the network busy
+            # while others parse and store. The dispatcher never has more than
+            # max_pages URLs out at once, so workers beyond that would sit idle
+            num_workers = min(
+                self.config.num_workers or 4 * self.config.max_concurrent_requests,
+                self.config.max_pages
+            )
+            queue: asyncio.Queue[UrlInfo] = asyncio.Queue(maxsize=num_workers)
+            workers = [
+                asyncio.create_task(self._crawler_worker(f"worker-{i}", queue))
+                for i in range(num_workers)
+            ]
             
-            # Wait for all workers to complete or reach limits
-            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await self._dispatch_urls(queue)
+                # Let already dispatched URLs finish
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+            
+            # Make every stored page visible to queries before reporting
+            await self.storage.flush()
             
             # Final statistics
             end_time = time.time()
@@ -124,49 +174,70 @@ class WebCrawler:
         finally:
             self.is_running = False
     
-    async def _crawler_worker(self, worker_id: str):
+    async def _dispatch_urls(self, queue: asyncio.Queue):
+        """
+        Feed URLs from the frontier to the worker queue until the crawl is done.
+        
+        The queue is bounded, so put() blocks while all workers are busy.
+        
+        Args:
+            queue: Queue consumed by the crawler workers
+        """
+        while self.is_running:
+            # Check if we've reached crawling limits
+            if self.pages_crawled >= self.config.max_pages:
+                logger.info("Reached maximum pages limit", 
+                          pages_crawled=self.pages_crawled,
+                          max_pages=self.config.max_pages)
+                break
+            
+            if self.pages_crawled + self.urls_in_flight >= self.config.max_pages:
+                # The rest of the budget is already dispatched; only URLs
+                # that fail to produce a page free some of it up again
+                await queue.join()
+                continue
+            
+            # Get next URL from frontier
+            url_info = await self.url_frontier.get_next_url()
+            if url_info:
+                self.urls_in_flight += 1
+                await queue.put(url_info)
+                continue
+            
+            if await self.url_frontier.is_empty():
+                # In-flight pages may still discover new links
+                await queue.join()
+                if await self.url_frontier.is_empty():
+                    logger.info("URL frontier is empty, stopping crawl")
+                    break
+                continue
+            
+            # Only politeness-delayed domains remain, wait until one is due
+            await self.url_frontier.wait_for_url(_IDLE_WAIT_TIMEOUT)
+    
+    async def _crawler_worker(self, worker_id: str, queue: asyncio.Queue):
         """
-        Worker coroutine that processes URLs from the frontier.
+        Worker coroutine that processes URLs from the dispatch queue.
         
         Args:
             worker_id: Unique identifier for this worker
+            queue: Queue of URLs to process
         """
         logger.debug("Crawler worker started", worker_id=worker_id)
         
-        while self.is_running:
-            try:
-                # Check if we've reached crawling limits
-                if self.pages_crawled >= self.config.max_pages:
-                    logger.info("Reached maximum pages limit", 
-                              pages_crawled=self.pages_crawled,
-                              max_pages=self.config.max_pages)
-                    break
-                
-                # Get next URL from frontier
-                url_info = await self.url_frontier.get_next_url()
-                if not url_info:
-                    # No URLs available, wait a bit and try again
-                    await asyncio.sleep(1)
-                    
-                    # Check if frontier is empty and we should stop
-                    if await self.url_frontier.is_empty():
-                        logger.info("URL frontier is empty, stopping worker", 
-                                  worker_id=worker_id)
-                        break
-                    continue
-                
-                # Process the URL
-                async with self.crawl_semaphore:
+        try:
+            while True:
+                url_info = await queue.get()
+                try:
                     await self._process_url(url_info, worker_id)
-                    
-            except asyncio.CancelledError:
-                logger.info("Worker cancelled", worker_id=worker_id)
-                break
-            except Exception as e:
-                logger.error("Worker error", worker_id=worker_id, error=str(e))
-                await asyncio.sleep(1)  # Brief pause before continuing
-        
-        logger.debug("Crawler worker stopped", worker_id=worker_id)
+                except Exception as e:
+                    logger.error("Worker error", worker_id=worker_id, error=str(e))
+                finally:
+                    self.urls_in_flight -= 1
+                    queue.task_done()
+        except asyncio.CancelledError:
+            logger.debug("Crawler worker stopped", worker_id=worker_id)
+            raise
     
     async def _process_url(self, url_info: UrlInfo, worker_id: str):
         """
@@ -198,7 +269,9 @@ class WebCrawler:
                 self.pages_crawled += 1
                 
                 # Parse the page
-                parsed_page = self.parser.parse(crawl_result.page)
+                parsed_page = await self.parser.parse_in_executor(
+                    crawl_result.page, self.parse_executor
+                )
                 
                 # Store the page
                 if await self.storage.store_page(parsed_page):
@@ -247,25 +320,25 @@ class WebCrawler:
             parent_url: URL of the parent page
             depth: Depth of the discovered links
         """
-        added_count = 0
+        # Build every link's URL info, then hand them to the frontier as one
+        # batch so they are persisted in a single transaction
+        priority = max(0, 100 - depth * 10)  # Decrease priority with depth
+        discovered_at = datetime.now()  # One timestamp for the whole page
+        seen_urls = self.url_frontier.seen_urls
+        url_infos = [
+            UrlInfo(url=link, depth=depth, parent_url=parent_url,
+                    priority=priority, discovered_at=discovered_at)
+            for link in links
+            if link not in seen_urls
+        ]
         
-        for link in links:
+        added_count = 0
+        if url_infos:
             try:
-                # Create URL info for the discovered link
-                url_info = UrlInfo(
-                    url=link,
-                    depth=depth,
-                    parent_url=parent_url,
-                    priority=max(0, 100 - depth * 10)  # Decrease priority with depth
-                )
-                
-                # Add to frontier
-                if await self.url_frontier.add_url(url_info):
-                    added_count += 1
-                    
+                added_count = await self.url_frontier.add_urls(url_infos)
             except Exception as e:
-                logger.debug("Failed to add discovered link", 
-                           link=link, parent_url=parent_url, error=str(e))
+                logger.debug("Failed to add discovered links", 
+                           parent_url=parent_url, error=str(e))
         
         if added_count > 0:
             logger.debug("Added discovered links to frontier", 
@@ -318,7 +391,14 @@ class WebCrawler:
         await self.url_frontier.cleanup()
         await self.robots_handler.cleanup()
         await self.fetcher.cleanup()
-        await self.storage.cleanup()
+        if self._owns_storage:
+            await self.storage.cleanup()
+        else:
+            await self.storage.flush()
+        
+        if self._owns_parse_executor and self.parse_executor:
+            self.parse_executor.shutdown(wait=True, cancel_futures=True)
+            self.parse_executor = None
         
         logger.info("Crawler cleanup completed")
     
@@ -6,38 +6,91 @@ and provides examples of crawling various types of websites.
 """
 
 import asyncio
-import json
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
+from urllib.parse import urlsplit
+import httpx
+import orjson
 import structlog
 
-from crawler import WebCrawler, CrawlerConfig
+from crawler import WebCrawler, CrawlerConfig, Storage
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
 
-# Configure structured logging
+
+# Configure structured logging; debug calls below INFO become no-ops
 structlog.configure(
     processors=[
         structlog.dev.ConsoleRenderer()
-    ]
+    ],
+    wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+    cache_logger_on_first_use=True
 )
 
 logger = structlog.get_logger()
 
+# The demos run concurrently, so each gets its own frontier database here
+DEMO_DATA_DIR = Path("./demo_data")
+
+# Hosts every demo starts from; their connections are opened up front
+DEMO_HOSTS = ("httpbin.org", "example.com")
+
+# Defaults shared by every demo; demo_config layers a demo's overrides on top
+BASE_CONFIG = CrawlerConfig(log_level="INFO")
+
+
+def demo_config(overrides):
+    """BASE_CONFIG with a demo's overrides, validated against the field constraints."""
+    return CrawlerConfig.model_validate({**BASE_CONFIG.model_dump(), **overrides})
+
+
+def emit(lines):
+    """Write a block of lines in one call so concurrent demos don't interleave mid-block."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def banner(title):
+    """Lines for a demo's section banner."""
+    return ["", "=" * 60, title, "=" * 60]
+
 
-async def demo_basic_crawl():
+async def resolves(url: str, timeout: float = 1.0) -> bool:
+    """Whether the URL's host resolves within timeout (a cheap preflight before crawling)."""
+    try:
+        await asyncio.wait_for(
+            asyncio.get_running_loop().getaddrinfo(urlsplit(url).hostname, None), timeout
+        )
+        return True
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+
+async def warm_connections(session: httpx.AsyncClient, hosts):
+    """Resolve and connect to hosts ahead of the crawls; failures are left to the crawls to report."""
+    await asyncio.gather(
+        *(session.head(f"https://{host}/", timeout=5.0) for host in hosts),
+        return_exceptions=True
+    )
+
+
+async def demo_basic_crawl(session: httpx.AsyncClient, storage: Storage, parse_executor: Executor):
     """Demonstrate basic web crawling functionality."""
-    print("\n" + "="*60)
-    print("BASIC WEB CRAWLER DEMO")
-    print("="*60)
-    
     # Configure crawler for basic demo
-    config = CrawlerConfig(
-        max_depth=2,
-        max_pages=20,
-        max_concurrent_requests=3,
-        request_delay=1.0,
-        allowed_domains=["httpbin.org", "example.com"],
-        log_level="INFO"
-    )
+    config = demo_config({
+        "frontier_db_path": DEMO_DATA_DIR / "basic_frontier.db",
+        "max_depth": 2,
+        "max_pages": 20,
+        "max_concurrent_requests": 3,
+        "request_delay": 1.0,
+        "allowed_domains": ["httpbin.org", "example.com"]
+    })
     
     # Seed URLs for demonstration
     seed_urls = [
@@ -45,89 +98,103 @@ async def demo_basic_crawl():
         "https://example.com/"
     ]
     
-    print(f"Configuration:")
-    print(f"  Max Depth: {config.max_depth}")
-    print(f"  Max Pages: {config.max_pages}")
-    print(f"  Concurrent Requests: {config.max_concurrent_requests}")
-    print(f"  Request Delay: {config.request_delay}s")
-    print(f"  Allowed Domains: {config.allowed_domains}")
-    print(f"  Seed URLs: {seed_urls}")
-    print()
+    emit([
+        *banner("BASIC WEB CRAWLER DEMO"),
+        "Configuration:",
+        f"  Max Depth: {config.max_depth}",
+        f"  Max Pages: {config.max_pages}",
+        f"  Concurrent Requests: {config.max_concurrent_requests}",
+        f"  Request Delay: {config.request_delay}s",
+        f"  Allowed Domains: {config.allowed_domains}",
+        f"  Seed URLs: {seed_urls}",
+        "",
+    ])
     
-    async with WebCrawler(config) as crawler:
+    async with WebCrawler(
+        config, session=session, storage=storage, parse_executor=parse_executor
+    ) as crawler:
         # Start crawling
         stats = await crawler.crawl(seed_urls)
         
-        # Display results
-        print("\nCRAWL RESULTS:")
-        print("-" * 40)
-        print(f"Total Runtime: {stats['total_runtime']:.2f} seconds")
-        print(f"Pages Crawled: {stats['pages_crawled']}")
-        print(f"Pages Stored: {stats['pages_stored']}")
-        print(f"Errors: {stats['errors']}")
-        print(f"Robots Denied: {stats['robots_denied']}")
-        print(f"Filtered: {stats['filtered']}")
-        
         # Get detailed statistics
         detailed_stats = await crawler.get_stats()
-        print(f"\nDETAILED STATISTICS:")
-        print("-" * 40)
-        print(json.dumps(detailed_stats, indent=2, default=str))
+        
+        # Display results
+        emit([
+            "",
+            "CRAWL RESULTS:",
+            "-" * 40,
+            f"Total Runtime: {stats['total_runtime']:.2f} seconds",
+            f"Pages Crawled: {stats['pages_crawled']}",
+            f"Pages Stored: {stats['pages_stored']}",
+            f"Errors: {stats['errors']}",
+            f"Robots Denied: {stats['robots_denied']}",
+            f"Filtered: {stats['filtered']}",
+            "",
+            "DETAILED STATISTICS:",
+            "-" * 40,
+            orjson.dumps(
+                detailed_stats, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str
+            ).decode(),
+        ])
 
 
-async def demo_focused_crawl():
+async def demo_focused_crawl(session: httpx.AsyncClient, storage: Storage, parse_executor: Executor):
     """Demonstrate focused crawling on a specific domain."""
-    print("\n" + "="*60)
-    print("FOCUSED DOMAIN CRAWL DEMO")
-    print("="*60)
-    
     # Configure for focused crawling
-    config = CrawlerConfig(
-        max_depth=3,
-        max_pages=50,
-        max_concurrent_requests=5,
-        request_delay=0.5,
-        allowed_domains=["httpbin.org"],  # Focus on one domain
-        respect_robots_txt=True,
-        log_level="INFO"
-    )
+    config = demo_config({
+        "frontier_db_path": DEMO_DATA_DIR / "focused_frontier.db",
+        "max_depth": 3,
+        "max_pages": 50,
+        "max_concurrent_requests": 5,
+        "request_delay": 0.5,
+        "allowed_domains": ["httpbin.org"],  # Focus on one domain
+        "respect_robots_txt": True
+    })
     
     seed_urls = ["https://httpbin.org/"]
     
-    print(f"Focused crawling on: {config.allowed_domains}")
-    print(f"Starting from: {seed_urls}")
-    print()
+    emit([
+        *banner("FOCUSED DOMAIN CRAWL DEMO"),
+        f"Focused crawling on: {config.allowed_domains}",
+        f"Starting from: {seed_urls}",
+        "",
+    ])
     
-    async with WebCrawler(config) as crawler:
+    async with WebCrawler(
+        config, session=session, storage=storage, parse_executor=parse_executor
+    ) as crawler:
         stats = await crawler.crawl(seed_urls)
         
-        print(f"\nFOCUSED CRAWL RESULTS:")
-        print("-" * 40)
-        print(f"Pages Crawled: {stats['pages_crawled']}")
-        print(f"Storage Statistics:")
+        lines = [
+            "",
+            "FOCUSED CRAWL RESULTS:",
+            "-" * 40,
+            f"Pages Crawled: {stats['pages_crawled']}",
+            "Storage Statistics:",
+        ]
         
         storage_stats = await crawler.storage.get_stats()
         if storage_stats:
-            print(f"  Total Pages in Storage: {storage_stats.get('total_pages', 0)}")
-            print(f"  Storage Size: {storage_stats.get('storage_size_mb', 0)} MB")
-            print(f"  Duplicate Content: {storage_stats.get('duplicate_content', 0)}")
+            lines += [
+                f"  Total Pages in Storage: {storage_stats.get('total_pages', 0)}",
+                f"  Storage Size: {storage_stats.get('storage_size_mb', 0)} MB",
+                f"  Duplicate Content: {storage_stats.get('duplicate_content', 0)}",
+            ]
+        emit(lines)
 
 
-async def demo_politeness_features():
+async def demo_politeness_features(session: httpx.AsyncClient, storage: Storage, parse_executor: Executor):
     """Demonstrate politeness features like robots.txt respect."""
-    print("\n" + "="*60)
-    print("POLITENESS FEATURES DEMO")
-    print("="*60)
-    
-    config = CrawlerConfig(
-        max_depth=1,
-        max_pages=10,
-        max_concurrent_requests=2,
-        request_delay=2.0,  # Longer delay to be polite
-        respect_robots_txt=True,
-        user_agent="WebCrawler Demo Bot/1.0 (+https://example.com/bot)",
-        log_level="INFO"
-    )
+    config = demo_config({
+        "frontier_db_path": DEMO_DATA_DIR / "politeness_frontier.db",
+        "max_depth": 1,
+        "max_pages": 10,
+        "max_concurrent_requests": 2,
+        "request_delay": 2.0,  # Longer delay to be polite
+        "respect_robots_txt": True,
+        "user_agent": "WebCrawler Demo Bot/1.0 (+https://example.com/bot)"
+    })
     
     # Test with sites that have robots.txt
     seed_urls = [
@@ -135,83 +202,95 @@ async def demo_politeness_features():
         "https://example.com/"
     ]
     
-    print(f"User Agent: {config.user_agent}")
-    print(f"Respecting robots.txt: {config.respect_robots_txt}")
-    print(f"Request Delay: {config.request_delay}s")
-    print()
+    emit([
+        *banner("POLITENESS FEATURES DEMO"),
+        f"User Agent: {config.user_agent}",
+        f"Respecting robots.txt: {config.respect_robots_txt}",
+        f"Request Delay: {config.request_delay}s",
+        "",
+    ])
     
-    async with WebCrawler(config) as crawler:
-        # Show robots.txt handling
-        for url in seed_urls:
-            can_fetch = await crawler.robots_handler.can_fetch(url)
-            crawl_delay = await crawler.robots_handler.get_crawl_delay(url)
-            print(f"Robots.txt for {url}:")
-            print(f"  Can Fetch: {can_fetch}")
-            print(f"  Suggested Delay: {crawl_delay}s")
+    async with WebCrawler(
+        config, session=session, storage=storage, parse_executor=parse_executor
+    ) as crawler:
+        # Show robots.txt handling; each host's robots.txt is fetched concurrently
+        results = await asyncio.gather(
+            *(crawler.robots_handler.inspect(url) for url in seed_urls)
+        )
+        lines = []
+        for url, (can_fetch, crawl_delay) in zip(seed_urls, results):
+            lines += [
+                f"Robots.txt for {url}:",
+                f"  Can Fetch: {can_fetch}",
+                f"  Suggested Delay: {crawl_delay}s",
+            ]
+        lines += ["", "Starting polite crawl..."]
+        emit(lines)
         
-        print("\nStarting polite crawl...")
         stats = await crawler.crawl(seed_urls)
         
-        print(f"\nPOLITENESS CRAWL RESULTS:")
-        print("-" * 40)
-        print(f"Pages Crawled: {stats['pages_crawled']}")
-        print(f"Robots Denied: {stats['robots_denied']}")
+        emit([
+            "",
+            "POLITENESS CRAWL RESULTS:",
+            "-" * 40,
+            f"Pages Crawled: {stats['pages_crawled']}",
+            f"Robots Denied: {stats['robots_denied']}",
+        ])
 
 
-async def demo_storage_query():
+async def demo_storage_query(session: httpx.AsyncClient, storage: Storage, parse_executor: Executor):
     """Demonstrate querying stored crawl data."""
-    print("\n" + "="*60)
-    print("STORAGE QUERY DEMO")
-    print("="*60)
-    
-    config = CrawlerConfig(
-        max_depth=2,
-        max_pages=15,
-        storage_dir=Path("./demo_crawl_data")
-    )
+    config = demo_config({
+        "frontier_db_path": DEMO_DATA_DIR / "storage_frontier.db",
+        "max_depth": 2,
+        "max_pages": 15
+    })
     
     seed_urls = ["https://httpbin.org/"]
     
-    async with WebCrawler(config) as crawler:
-        print("Crawling pages for storage demo...")
+    async with WebCrawler(
+        config, session=session, storage=storage, parse_executor=parse_executor
+    ) as crawler:
+        emit([*banner("STORAGE QUERY DEMO"), "Crawling pages for storage demo..."])
         await crawler.crawl(seed_urls)
         
-        # Query stored data
-        print("\nQUERYING STORED DATA:")
-        print("-" * 40)
-        
-        # Search by domain
-        pages = await crawler.storage.search_pages(domain="httpbin.org", limit=5)
-        print(f"Found {len(pages)} pages for httpbin.org domain:")
-        
-        for page in pages:
-            print(f"  - {page['url']} (Title: {page.get('title', 'N/A')})")
+        # Query stored data; one search by domain returns the details shown below too
+        pages = await crawler.storage.search_pages(
+            domain="httpbin.org", limit=5,
+            fields=("url", "title", "status_code", "content_type", "file_size", "links_count")
+        )
+        lines = [
+            "",
+            "QUERYING STORED DATA:",
+            "-" * 40,
+            f"Found {len(pages)} pages for httpbin.org domain:",
+        ]
+        lines += [f"  - {url} (Title: {title or 'N/A'})" for url, title, *_ in pages]
         
-        # Get specific page
+        # Details of the first page
         if pages:
-            url = pages[0]['url']
-            page_data = await crawler.storage.get_page(url)
-            if page_data:
-                print(f"\nDetailed data for {url}:")
-                print(f"  Status Code: {page_data.status_code}")
-                print(f"  Content Type: {page_data.content_type}")
-                print(f"  File Size: {page_data.file_size} bytes")
-                print(f"  Links Found: {len(page_data.links)}")
+            url, _, status_code, content_type, file_size, links_count = pages[0]
+            lines += [
+                "",
+                f"Detailed data for {url}:",
+                f"  Status Code: {status_code}",
+                f"  Content Type: {content_type}",
+                f"  File Size: {file_size} bytes",
+                f"  Links Found: {links_count}",
+            ]
+        emit(lines)
 
 
-async def demo_error_handling():
+async def demo_error_handling(session: httpx.AsyncClient, storage: Storage, parse_executor: Executor):
     """Demonstrate error handling and recovery."""
-    print("\n" + "="*60)
-    print("ERROR HANDLING DEMO")
-    print("="*60)
-    
-    config = CrawlerConfig(
-        max_depth=1,
-        max_pages=10,
-        max_concurrent_requests=3,
-        request_timeout=5,  # Short timeout to trigger errors
-        log_level="DEBUG"
-    )
+    config = demo_config({
+        "frontier_db_path": DEMO_DATA_DIR / "errors_frontier.db",
+        "max_depth": 1,
+        "max_pages": 10,
+        "max_concurrent_requests": 3,
+        "request_timeout": 5,  # Short timeout to trigger errors
+        "log_level": "DEBUG"
+    })
     
     # Include some URLs that will cause errors
     seed_urls = [
@@ -222,64 +301,144 @@ async def demo_error_handling():
         "https://httpbin.org/delay/10"  # Will timeout
     ]
     
-    print("Testing error handling with problematic URLs:")
-    for url in seed_urls:
-        print(f"  - {url}")
-    print()
+    # Seeds whose host doesn't resolve would only hold a fetch slot until the
+    # DNS error comes back, so drop them before handing the rest to the crawler
+    resolved = await asyncio.gather(*(resolves(url) for url in seed_urls))
+    unresolved = [url for url, ok in zip(seed_urls, resolved) if not ok]
+    seed_urls = [url for url, ok in zip(seed_urls, resolved) if ok]
     
-    async with WebCrawler(config) as crawler:
+    lines = [
+        *banner("ERROR HANDLING DEMO"),
+        "Testing error handling with problematic URLs:",
+        *(f"  - {url}" for url in seed_urls),
+    ]
+    if unresolved:
+        lines.append("Skipped before crawling (host does not resolve):")
+        lines += [f"  - {url}" for url in unresolved]
+    emit(lines + [""])
+    
+    async with WebCrawler(
+        config, session=session, storage=storage, parse_executor=parse_executor
+    ) as crawler:
         stats = await crawler.crawl(seed_urls)
-        
-        print(f"\nERROR HANDLING RESULTS:")
-        print("-" * 40)
-        print(f"Pages Crawled Successfully: {stats['pages_crawled']}")
-        print(f"Errors Encountered: {stats['errors']}")
-        print(f"Success Rate: {stats['pages_crawled'] / (stats['pages_crawled'] + stats['errors']) * 100:.1f}%")
+        attempted = max(1, stats['pages_crawled'] + stats['errors'])
         
         # Show component statistics
         detailed_stats = await crawler.get_stats()
         fetcher_stats = detailed_stats.get('fetcher', {})
-        print(f"Fetcher Success Rate: {fetcher_stats.get('success_rate', 0) * 100:.1f}%")
+        
+        emit([
+            "",
+            "ERROR HANDLING RESULTS:",
+            "-" * 40,
+            f"Pages Crawled Successfully: {stats['pages_crawled']}",
+            f"Errors Encountered: {stats['errors']}",
+            f"Skipped Seeds: {len(unresolved)}",
+            f"Success Rate: {stats['pages_crawled'] / attempted * 100:.1f}%",
+            f"Fetcher Success Rate: {fetcher_stats.get('success_rate', 0) * 100:.1f}%",
+        ])
 
 
 async def main():
-    """Run all demonstration scenarios."""
-    print("WEB CRAWLER COMPREHENSIVE DEMO")
-    print("=" * 60)
-    print("This demo showcases various features of the web crawler implementation")
-    print("following the design principles from Chapter 9.")
-    print()
+    """Run all demonstration scenarios; returns the process exit code."""
+    emit([
+        "WEB CRAWLER COMPREHENSIVE DEMO",
+        "=" * 60,
+        "This demo showcases various features of the web crawler implementation",
+        "following the design principles from Chapter 9.",
+        "",
+    ])
+    
+    # One client for every demo: they hit the same hosts, so keep-alive
+    # connections and TLS sessions carry over from one crawl to the next
+    limits = httpx.Limits(
+        max_connections=BASE_CONFIG.connection_limit,
+        max_keepalive_connections=20,
+        keepalive_expiry=75
+    )
+    
+    # One storage (database connection and writer) for every demo as well;
+    # its single writer task serializes their concurrent saves
+    DEMO_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    # A frontier database resumes its crawl and won't queue stored seeds
+    # again, so each demo run starts from empty frontiers
+    for frontier_file in DEMO_DATA_DIR.glob("*_frontier.db*"):
+        frontier_file.unlink()
+    storage = Storage(demo_config({"storage_dir": Path("./demo_crawl_data")}))
+    
+    # And one parse pool: a pool per crawler would start a full set of
+    # worker processes for each concurrently running demo
+    parse_executor = ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn")
+    )
     
     try:
-        # Run different demonstration scenarios
-        await demo_basic_crawl()
-        await demo_focused_crawl()
-        await demo_politeness_features()
-        await demo_storage_query()
-        await demo_error_handling()
+        async with httpx.AsyncClient(http2=True, limits=limits, follow_redirects=True) as session:
+            # DNS, TCP and TLS for the seed hosts overlap with storage setup,
+            # so the first crawl requests go out on warm keep-alive connections
+            warmup = asyncio.create_task(warm_connections(session, DEMO_HOSTS))
+            await storage.initialize()
+            await warmup
+            
+            # Run the demonstration scenarios concurrently; they are
+            # network-bound, so total time is roughly that of the slowest one
+            demos = [
+                demo_basic_crawl,
+                demo_focused_crawl,
+                demo_politeness_features,
+                demo_storage_query,
+                demo_error_handling,
+            ]
+            results = await asyncio.gather(
+                *(demo(session, storage, parse_executor) for demo in demos),
+                return_exceptions=True
+            )
+            failed = []
+            for demo, result in zip(demos, results):
+                if isinstance(result, Exception):
+                    logger.error("Demo scenario failed", demo=demo.__name__, error=str(result))
+                    failed.append(demo.__name__)
         
-        print("\n" + "="*60)
-        print("DEMO COMPLETED SUCCESSFULLY!")
-        print("="*60)
-        print("\nKey Features Demonstrated:")
-        print("✓ Basic web crawling with URL frontier")
-        print("✓ Focused domain crawling")
-        print("✓ Politeness with robots.txt respect")
-        print("✓ Persistent storage and querying")
-        print("✓ Robust error handling")
-        print("✓ Concurrent request processing")
-        print("✓ Configurable crawling parameters")
-        print("\nCheck the generated files:")
-        print("- crawler_frontier.db: URL frontier database")
-        print("- crawler_storage.db: Crawled data database")
-        print("- ./demo_crawl_data/: Stored content and metadata")
+        if failed:
+            emit([
+                *banner("DEMO FAILED"),
+                f"{len(failed)} of {len(demos)} scenarios failed:",
+                *(f"  - {name}" for name in failed),
+            ])
+            return 1
+        
+        emit([
+            *banner("DEMO COMPLETED SUCCESSFULLY!"),
+            "",
+            "Key Features Demonstrated:",
+            "✓ Basic web crawling with URL frontier",
+            "✓ Focused domain crawling",
+            "✓ Politeness with robots.txt respect",
+            "✓ Persistent storage and querying",
+            "✓ Robust error handling",
+            "✓ Concurrent request processing",
+            "✓ Configurable crawling parameters",
+            "",
+            "Check the generated files:",
+            "- ./demo_data/*_frontier.db: URL frontier databases, one per demo",
+            "- crawler_storage.db: Crawled data database",
+            "- ./demo_crawl_data/: Stored content and metadata",
+        ])
         
     except KeyboardInterrupt:
         print("\nDemo interrupted by user.")
+        return 1
     except Exception as e:
         logger.error("Demo failed", error=str(e))
         raise
+    finally:
+        await storage.cleanup()
+        parse_executor.shutdown(wait=True, cancel_futures=True)
+    
+    return 0
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # libuv-based event loop cuts per-task scheduling and socket overhead
+    sys.exit(asyncio.run(main(), loop_factory=uvloop.new_event_loop if uvloop else None))
@@ -0,0 +1,103 @@
+from urllib.robotparser import RobotFileParser
+
+import pytest
+
+from crawler.robots_handler import RobotsRules
+
+
+def rules_for(*lines, user_agent="TestBot"):
+    """Compile the robots.txt group that applies to user_agent."""
+    parser = RobotFileParser()
+    parser.parse(lines)
+    return RobotsRules.from_parser(parser, user_agent)
+
+
+def test_no_rules_allows_everything():
+    """Test that an empty robots.txt allows every path"""
+    rules = rules_for()
+    assert rules.can_fetch("https://example.com/")
+    assert rules.can_fetch("https://example.com/any/path")
+
+
+def test_longer_allow_overrides_disallow():
+    """Test that a more specific Allow wins even when listed after the Disallow"""
+    rules = rules_for(
+        "User-agent: *",
+        "Disallow: /private/",
+        "Allow: /private/public",
+    )
+    assert not rules.can_fetch("https://example.com/private/secret")
+    assert rules.can_fetch("https://example.com/private/public/page")
+    assert rules.can_fetch("https://example.com/other")
+
+
+def test_longer_disallow_overrides_allow():
+    """Test that a more specific Disallow wins even when listed after the Allow"""
+    rules = rules_for(
+        "User-agent: *",
+        "Allow: /docs/",
+        "Disallow: /docs/drafts/",
+    )
+    assert rules.can_fetch("https://example.com/docs/guide")
+    assert not rules.can_fetch("https://example.com/docs/drafts/v2")
+
+
+def test_allow_wins_ties():
+    """Test that equally long Allow and Disallow rules resolve to allowed"""
+    rules = rules_for(
+        "User-agent: *",
+        "Disallow: /page",
+        "Allow: /page",
+    )
+    assert rules.can_fetch("https://example.com/page")
+
+
+@pytest.mark.parametrize("path, allowed", [
+    ("/index.php", False),
+    ("/dir/file.php", False),
+    ("/file.php?query=1", True),  # $ anchors the end of the path
+    ("/file.php5", True),
+    ("/file.html", True),
+])
+def test_wildcard_with_end_anchor(path, allowed):
+    """Test '*' and a trailing '$' in a Disallow rule"""
+    rules = rules_for(
+        "User-agent: *",
+        "Disallow: /*.php$",
+    )
+    assert rules.can_fetch(f"https://example.com{path}") is allowed
+
+
+def test_wildcard_rules_use_rule_length_precedence():
+    """Test that a wildcard Allow longer than the Disallow it overlaps wins"""
+    rules = rules_for(
+        "User-agent: *",
+        "Disallow: /shop/",
+        "Allow: /shop/*/public",
+    )
+    assert not rules.can_fetch("https://example.com/shop/cart")
+    assert rules.can_fetch("https://example.com/shop/item-1/public")
+
+
+def test_root_only_allow():
+    """Test that 'Allow: /$' opens the home page of an otherwise closed site"""
+    rules = rules_for(
+        "User-agent: *",
+        "Disallow: /",
+        "Allow: /$",
+    )
+    assert rules.can_fetch("https://example.com/")
+    assert not rules.can_fetch("https://example.com/about")
+
+
+def test_user_agent_group_selection():
+    """Test that a group naming the crawler takes precedence over the '*' group"""
+    rules = rules_for(
+        "User-agent: TestBot",
+        "Disallow: /bot-only/",
+        "",
+        "User-agent: *",
+        "Disallow: /",
+    )
+    assert rules.can_fetch("https://example.com/page")
+    assert not rules.can_fetch("https://example.com/bot-only/page")
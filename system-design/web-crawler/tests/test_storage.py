@@ -0,0 +1,144 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+import zstandard as zstd
+
+from crawler.config import CrawlerConfig
+from crawler.models import CrawledPage
+from crawler.storage import Storage
+
+# crawled_pages/extracted_links as created before the schema was versioned:
+# ISO text timestamps and no content_encoding column
+V0_SCHEMA = """
+    CREATE TABLE crawled_pages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT UNIQUE NOT NULL,
+        url_hash TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        title TEXT,
+        content_type TEXT,
+        status_code INTEGER,
+        file_size INTEGER,
+        content_hash TEXT,
+        meta_description TEXT,
+        meta_keywords TEXT,
+        parent_url TEXT,
+        depth INTEGER,
+        crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        links_count INTEGER DEFAULT 0,
+        images_count INTEGER DEFAULT 0,
+        content_file_path TEXT,
+        metadata_file_path TEXT
+    );
+    CREATE TABLE extracted_links (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_url TEXT NOT NULL,
+        target_url TEXT NOT NULL,
+        link_text TEXT,
+        discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (source_url) REFERENCES crawled_pages (url)
+    );
+    CREATE INDEX idx_domain ON crawled_pages(domain);
+"""
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Config storing under tmp_path; the storage database lives in the working directory"""
+    monkeypatch.chdir(tmp_path)
+    return CrawlerConfig(storage_dir=tmp_path / "data")
+
+
+def make_page(url, content=b"<html><body>Hello</body></html>"):
+    """A successfully fetched HTML page."""
+    return CrawledPage(
+        url=url,
+        status_code=200,
+        content_type="text/html",
+        content=content,
+        title="Hello",
+        links=["https://example.com/next"],
+        file_size=len(content),
+        domain="example.com",
+    )
+
+
+async def test_content_round_trip(config):
+    """Test that page content is stored zstd-compressed and read back intact"""
+    content = b"<html><body>" + b"repeated text " * 500 + b"</body></html>"
+    storage = Storage(config)
+    await storage.initialize()
+    try:
+        assert await storage.store_page(make_page("https://example.com/", content))
+        await storage.flush()
+        
+        page = await storage.get_page("https://example.com/")
+        assert page.content == content
+        assert page.title == "Hello"
+        
+        (content_file,) = (config.storage_dir / "content").rglob("*.zst")
+        assert zstd.ZstdDecompressor().decompress(content_file.read_bytes()) == content
+        assert content_file.stat().st_size < len(content)
+    finally:
+        await storage.cleanup()
+
+
+async def test_duplicate_content_keeps_metadata_only(config):
+    """Test that a page repeating stored content gets a row but no content file"""
+    storage = Storage(config)
+    await storage.initialize()
+    try:
+        assert await storage.store_page(make_page("https://example.com/a"))
+        assert await storage.store_page(make_page("https://example.com/b"))
+        await storage.flush()
+        
+        assert storage.total_stored == 1
+        assert storage.duplicate_content == 1
+        assert (await storage.get_page("https://example.com/b")).content == b""
+        assert len(list((config.storage_dir / "content").rglob("*.zst"))) == 1
+    finally:
+        await storage.cleanup()
+
+
+async def test_migrates_v0_database(config):
+    """Test that a database from before user_version migrations is upgraded and usable"""
+    crawled_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    conn = sqlite3.connect("crawler_storage.db")
+    conn.executescript(V0_SCHEMA)
+    conn.execute(
+        "INSERT INTO crawled_pages (url, url_hash, domain, title, content_type, status_code, depth, crawled_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ("https://example.com/old", "hash", "example.com", "Old", "text/html", 200, 0, crawled_at.isoformat())
+    )
+    conn.execute(
+        "INSERT INTO extracted_links (source_url, target_url, link_text) VALUES (?, ?, '')",
+        ("https://example.com/old", "https://example.com/next")
+    )
+    conn.commit()
+    conn.close()
+    
+    storage = Storage(config)
+    await storage.initialize()
+    try:
+        # Text timestamps became epoch seconds that read back as the same time
+        page = await storage.get_page("https://example.com/old")
+        assert page.crawled_at == crawled_at.replace(microsecond=0)
+        rows = await storage.search_pages(domain="example.com", fields=("url", "crawled_at"))
+        assert rows == [("https://example.com/old", int(crawled_at.timestamp()))]
+        
+        # The added content_encoding column accepts new pages
+        assert await storage.store_page(make_page("https://example.com/new"))
+        await storage.flush()
+        assert (await storage.get_page("https://example.com/new")).title == "Hello"
+    finally:
+        await storage.cleanup()
+    
+    conn = sqlite3.connect("crawler_storage.db")
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone() == (2,)
+        assert conn.execute(
+            "SELECT COUNT(*) FROM extracted_links WHERE typeof(discovered_at) != 'integer'"
+        ).fetchone() == (0,)
+    finally:
+        conn.close()
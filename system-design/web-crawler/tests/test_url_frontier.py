@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from crawler.config import CrawlerConfig
+from crawler.models import UrlInfo
+from crawler.url_frontier import UrlFrontier
+
+
+def make_config(tmp_path, **overrides):
+    """Config with a per-test frontier database and the shortest politeness delay."""
+    return CrawlerConfig(
+        frontier_db_path=tmp_path / "frontier.db",
+        request_delay=0.1,
+        **overrides
+    )
+
+
+async def drain(frontier, timeout=10.0):
+    """Pull every URL the frontier hands out, waiting out politeness delays."""
+    urls = []
+    async with asyncio.timeout(timeout):
+        while not await frontier.is_empty():
+            url_info = await frontier.get_next_url()
+            if url_info:
+                urls.append(url_info.url)
+                await frontier.mark_completed(url_info.url)
+            else:
+                await frontier.wait_for_url(1.0)
+    return urls
+
+
+@pytest.fixture
+async def frontier(tmp_path):
+    """Initialized frontier with a small per-domain queue cap"""
+    frontier = UrlFrontier(make_config(tmp_path, domain_queue_cap=2))
+    await frontier.initialize()
+    yield frontier
+    await frontier.cleanup()
+
+
+async def test_add_urls_skips_seen(frontier):
+    """Test that a URL is only added once"""
+    url_info = UrlInfo(url="https://example.com/", depth=0)
+    assert await frontier.add_urls([url_info, url_info]) == 1
+    assert await frontier.add_urls([url_info]) == 0
+    
+    stats = await frontier.get_stats()
+    assert stats["pending"] == 1
+    assert stats["in_memory"] == 1
+
+
+async def test_refill_after_spill(frontier):
+    """Test that URLs beyond domain_queue_cap wait on disk and are refilled in order"""
+    urls = [f"https://example.com/page{i}" for i in range(5)]
+    assert await frontier.add_urls([UrlInfo(url=url, depth=1) for url in urls]) == 5
+    
+    # Only the cap stays in memory; the rest live in the database
+    stats = await frontier.get_stats()
+    assert stats["in_memory"] == 2
+    assert stats["pending"] == 5
+    
+    assert await drain(frontier) == urls
+    assert await frontier.is_empty()
+    
+    await frontier.flush()
+    stats = await frontier.get_stats()
+    assert stats["pending"] == 0
+    assert stats["success"] == 5
+
+
+async def test_failed_insert_leaves_memory_unchanged(frontier):
+    """Test that a rolled-back batch is neither queued nor counted"""
+    await frontier._db.execute("""
+        CREATE TRIGGER reject_url BEFORE INSERT ON url_queue
+        WHEN NEW.url LIKE '%reject%'
+        BEGIN SELECT RAISE(ABORT, 'rejected'); END
+    """)
+    batch = [
+        UrlInfo(url="https://example.com/ok", depth=0),
+        UrlInfo(url="https://example.com/reject", depth=0),
+    ]
+    assert await frontier.add_urls(batch) == 0
+    
+    stats = await frontier.get_stats()
+    assert stats.get("pending", 0) == 0
+    assert stats["in_memory"] == 0
+    
+    # Nothing was marked seen, so the URLs can be added once the insert works
+    await frontier._db.execute("DROP TRIGGER reject_url")
+    assert await frontier.add_urls(batch) == 2
+
+
+async def test_keyset_paged_reload(tmp_path):
+    """Test that a reopened frontier loads its pending backlog batch by batch"""
+    urls = [f"https://site{i}.example/" for i in range(10)]
+    frontier = UrlFrontier(make_config(tmp_path))
+    await frontier.initialize()
+    await frontier.add_urls([
+        UrlInfo(url=url, depth=0, priority=100 - i) for i, url in enumerate(urls)
+    ])
+    await frontier.cleanup()
+    
+    frontier = UrlFrontier(make_config(tmp_path, frontier_load_batch_size=3))
+    await frontier.initialize()
+    try:
+        # Only the first batch is in memory after startup
+        assert (await frontier.get_stats())["in_memory"] == 3
+        
+        # Highest priority first, every stored URL exactly once
+        assert await drain(frontier) == urls
+        
+        # URLs stored by the earlier run are not queued a second time
+        assert await frontier.add_urls([UrlInfo(url=urls[0], depth=0)]) == 0
+    finally:
+        await frontier.cleanup()